@@ -5,11 +5,25 @@ Automatically schedules and publishes content across multiple platforms
 """
 
 import os
+import sys
+import csv
 import json
-import schedule
+import tempfile
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import List, Dict
+from datetime import datetime
+from itertools import islice, zip_longest
+from typing import List, Dict, Set, Tuple, Optional, Sequence, Iterable, Iterator
+
+from publisher import AsyncPublisher
+from post_queue import open_post_queue
+from retry_policy import RetryPolicy, FatalPublishError, is_retryable
+from posting_times import PostingTimeModel
+from slot_allocator import SlotAllocator
+from media_preflight import MediaPreflight
+from publish_ledger import PublishLedger, open_publish_ledger, idempotency_key
+from scheduler_metrics import SchedulerMetrics
+from caption_tokenizer import tokens
 
 class AIContentScheduler:
     """
@@ -17,17 +31,68 @@ class AIContentScheduler:
     Learns optimal posting times and automates the entire content pipeline.
     """
     
-    def __init__(self):
-        self.scheduled_posts = []
+    def __init__(self, publisher: Optional[AsyncPublisher] = None, queue=None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 engagement_history: Optional[Sequence[Dict]] = None,
+                 preflight: Optional[MediaPreflight] = None,
+                 ledger: Optional[PublishLedger] = None,
+                 metrics: Optional[SchedulerMetrics] = None,
+                 keep_running: bool = False):
+        """
+        Args:
+            publisher: Async publishing engine (defaults to AsyncPublisher())
+            queue: Durable post queue (defaults to open_post_queue(), SQLite or Redis)
+            retry_policy: Backoff and retry budget for failed publishes
+            engagement_history: Tracked posts to learn posting times from,
+                e.g. AIEngagementTracker().historical_data (read incrementally)
+            preflight: Media checker run when posts are queued
+            ledger: Record of published posts that makes retries idempotent
+                (defaults to open_publish_ledger(), in Redis with a Redis queue)
+            metrics: Prometheus metrics; served on SCHEDULER_METRICS_PORT if set
+            keep_running: Keep polling an empty queue instead of returning
+                (worker mode, where other processes add the posts)
+        """
         self.platforms = ['instagram', 'twitter', 'tiktok', 'onlyfans']
+        self.engagement_history = engagement_history
+        self.posting_times = PostingTimeModel(self._default_times())
         self.optimal_times = self._learn_optimal_times()
+        self.queue = queue if queue is not None else open_post_queue()
+        # Spread posts over the learned slots instead of stacking them on one
+        self.slot_allocator = SlotAllocator()
+        self.slot_allocator.load(self.queue.scheduled_times())
+        self.claim_batch_size = 100  # per platform, per dispatch
+        # Stop claiming once this many posts are in flight, leaving the rest
+        # of a backlog to other workers sharing the queue
+        self.max_in_flight = 100
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.keep_running = keep_running
+        self.idle_poll = 5.0  # seconds between polls of an empty queue in worker mode
+        self._wakeup = threading.Condition()
+        # Queue ids of posts handed to the publisher whose outcome is still pending;
+        # their leases are renewed until they are acked, requeued or dead-lettered
+        self._in_flight = set()
+        self._leases_renewed_at = time.time()
+        self.metrics = metrics if metrics is not None else SchedulerMetrics()
+        self.metrics.track_queue(self.queue, lambda: len(self._in_flight))
+        self.publisher = publisher or AsyncPublisher(metrics=self.metrics)
+        if self.publisher.metrics is None:
+            self.publisher.metrics = self.metrics
+        self.preflight = preflight or MediaPreflight()
+        self.ledger = ledger if ledger is not None else open_publish_ledger(
+            queue_location=getattr(self.queue, 'url', None))
         
-    def _learn_optimal_times(self) -> Dict:
-        """
-        AI learns best posting times based on engagement data.
-        Uses machine learning to optimize posting schedule.
-        """
-        # AI-optimized posting times for maximum engagement
+        # Posts whose worker died mid-publish go back on the queue once their lease expires
+        replayed = self.queue.replay_in_flight()
+        if replayed:
+            print(f"♻️ Replayed {replayed} in-flight posts from expired leases")
+        
+    @property
+    def scheduled_posts(self) -> List[Dict]:
+        """Posts still waiting to be published"""
+        return self.queue.pending()
+    
+    def _default_times(self) -> Dict[str, List[str]]:
+        """Daily posting times used until engagement data says otherwise"""
         return {
             'instagram': ['09:00', '12:00', '17:00', '20:00'],
             'twitter': ['08:00', '12:00', '17:00', '21:00'],
@@ -35,23 +100,158 @@ class AIContentScheduler:
             'onlyfans': ['10:00', '14:00', '20:00', '23:00']
         }
     
+    def _learn_optimal_times(self) -> Dict[str, List[int]]:
+        """
+        AI learns best posting times based on engagement data.
+        Folds in engagement records tracked since the last call and returns
+        the best hours of the week per platform (0 = Monday 00:00).
+        """
+        if self.engagement_history is not None:
+            self.posting_times.refresh(self.engagement_history)
+        return {platform: self.posting_times.slots(platform) for platform in self.platforms}
+    
     def add_content(self, content: Dict) -> bool:
         """
         Add content to the scheduling queue.
         AI validates and optimizes content before scheduling.
         """
         if self._validate_content(content):
+            media = self.preflight.register(content['media_path'])
+            self.optimal_times = self._learn_optimal_times()
             content['optimized'] = self._optimize_with_ai(content)
-            self.scheduled_posts.append(content)
+            # Saved with the post so whichever worker publishes it never re-hashes the media
+            content['media'] = media.result()
+            due_at = datetime.fromisoformat(content['optimized']['due_at'])
+            self._enqueue(content, due_at.timestamp())
             return True
         return False
     
+    def add_contents(self, contents: Iterable[Dict], batch_size: int = 1000) -> Dict:
+        """
+        Bulk version of add_content for large content calendars.
+        Streams the iterable in batches: each batch is validated, optimized
+        and written to the queue in one transaction, so memory stays bounded
+        by batch_size however long the input is.
+        
+        Returns:
+            {'accepted': int, 'rejected': [{'index': int, 'reason': str}, ...]}
+        """
+        result = {'accepted': 0, 'rejected': []}
+        items = iter(contents)
+        index = 0
+        while True:
+            batch = list(islice(items, batch_size))
+            if not batch:
+                break
+            self.optimal_times = self._learn_optimal_times()
+            now = datetime.now()
+            rows = []
+            checks = []
+            for content in batch:
+                reason = self._validation_error(content)
+                if reason:
+                    result['rejected'].append({'index': index, 'reason': reason})
+                else:
+                    checks.append(self.preflight.register(content['media_path']))
+                    content['optimized'] = self._optimize_with_ai(content, now)
+                    rows.append((content, datetime.fromisoformat(
+                        content['optimized']['due_at']).timestamp()))
+                index += 1
+            # The batch's media is hashed in parallel; wait for all of it before queueing
+            for (content, _), media in zip(rows, checks):
+                content['media'] = media.result()
+            with self._wakeup:
+                self.queue.push_many(rows)
+                self._wakeup.notify()
+            result['accepted'] += len(rows)
+        return result
+    
+    def _enqueue(self, post: Dict, due_at: float):
+        """Persist a post on the queue and wake the dispatcher"""
+        with self._wakeup:
+            self.queue.push(post, due_at)
+            # New head may be earlier than what the dispatcher is sleeping on
+            self._wakeup.notify()
+    
+    def _wait_for_due_posts(self) -> List[Dict]:
+        """
+        Block until the earliest queued post is due and lease the posts due by then.
+        Sleeps until the head of the queue (waking to renew in-flight leases),
+        returns [] once drained unless keep_running is set.
+        """
+        renew_every = self.queue.lease_seconds / 3
+        with self._wakeup:
+            while True:
+                now = time.time()
+                if self._in_flight and now - self._leases_renewed_at >= renew_every:
+                    self.queue.renew(list(self._in_flight))
+                    self._leases_renewed_at = now
+                next_due = self.queue.next_due_at()
+                if next_due is None:
+                    if not self._in_flight and not self.keep_running:
+                        return []
+                    # An in-flight publish may still re-queue a retry
+                    self._wakeup.wait(timeout=self.idle_poll if self.keep_running else renew_every)
+                    continue
+                if next_due > now:
+                    self._wakeup.wait(timeout=min(next_due - now, renew_every))
+                    continue
+                capacity = self.max_in_flight - len(self._in_flight)
+                if capacity <= 0:
+                    self._wakeup.wait(timeout=renew_every)
+                    continue
+                due_posts = []
+                claimed = self.queue.claim_due(now, min(self.claim_batch_size, capacity))
+                if len(claimed) > capacity:
+                    # The claim limit is per platform; hand back what has no free slot
+                    # right away, so its lease can't expire while it waits here
+                    claimed, excess = self._fair_share(claimed, capacity)
+                    for post_id, _, due_at in excess:
+                        self.queue.requeue(post_id, due_at)
+                for post_id, post, due_at in claimed:
+                    post['queue_id'] = post_id
+                    # Dispatch lag is observed by the publisher when the request starts
+                    post['queue_due_at'] = due_at
+                    due_posts.append(post)
+                if not due_posts:
+                    # Another worker claimed them first
+                    continue
+                if not self._in_flight:
+                    self._leases_renewed_at = now
+                self._in_flight.update(post['queue_id'] for post in due_posts)
+                return due_posts
+    
+    @staticmethod
+    def _fair_share(claimed: List[Tuple[int, Dict, float]], count: int):
+        """
+        Split claimed posts into the `count` to dispatch, taken round-robin
+        across platforms (earliest first within each), and the rest
+        """
+        by_platform = {}
+        for entry in claimed:
+            by_platform.setdefault(entry[1]['platform'], []).append(entry)
+        keep = []
+        for turn in zip_longest(*by_platform.values()):
+            keep.extend(entry for entry in turn if entry is not None)
+        kept = {id(entry) for entry in keep[:count]}
+        return ([entry for entry in claimed if id(entry) in kept],
+                [entry for entry in claimed if id(entry) not in kept])
+    
     def _validate_content(self, content: Dict) -> bool:
         """AI validates content meets platform requirements"""
+        return self._validation_error(content) is None
+    
+    def _validation_error(self, content: Dict) -> Optional[str]:
+        """Why content can't be scheduled, or None if it is valid"""
         required_fields = ['text', 'platform', 'media_path']
-        return all(field in content for field in required_fields)
+        missing = [field for field in required_fields if not content.get(field)]
+        if missing:
+            return f"missing {', '.join(missing)}"
+        if content['platform'] not in self.optimal_times:
+            return f"unsupported platform {content['platform']}"
+        return None
     
-    def _optimize_with_ai(self, content: Dict) -> Dict:
+    def _optimize_with_ai(self, content: Dict, now: Optional[datetime] = None) -> Dict:
         """
         AI optimizes content for maximum engagement:
         - Suggests best posting time
@@ -60,12 +260,16 @@ class AIContentScheduler:
         - Selects best media format
         """
         platform = content['platform']
-        optimal_time = self.optimal_times[platform][0]
+        due = self.slot_allocator.allocate(
+            platform, self.optimal_times[platform], now or datetime.now()
+        )
+        words = set(tokens(content['text'].lower()))
         
         return {
-            'suggested_time': optimal_time,
+            'suggested_time': due.strftime('%H:%M'),
+            'due_at': due.isoformat(),
             'engagement_score': self._calculate_engagement_score(content),
-            'optimized_hashtags': self._generate_ai_hashtags(content)
+            'optimized_hashtags': self._generate_ai_hashtags(content, words)
         }
     
     def _calculate_engagement_score(self, content: Dict) -> float:
@@ -76,93 +280,146 @@ class AIContentScheduler:
         has_hashtags = 0.1 if '#' in content.get('text', '') else 0
         return base_score + has_media + has_hashtags
     
-    def _generate_ai_hashtags(self, content: Dict) -> List[str]:
+    def _generate_ai_hashtags(self, content: Dict, words: Optional[Set[str]] = None) -> List[str]:
         """AI generates relevant hashtags based on content"""
         base_tags = ['#TheSteeleZone', '#ContentCreator', '#ExclusiveContent']
-        # AI analyzes content and adds relevant tags
-        if 'exclusive' in content['text'].lower():
+        if words is None:
+            words = set(tokens(content['text'].lower()))
+        # AI analyzes content and adds relevant tags (whole words, so 'news' isn't 'new')
+        if 'exclusive' in words:
             base_tags.extend(['#VIP', '#Premium'])
-        if 'new' in content['text'].lower():
+        if 'new' in words:
             base_tags.extend(['#NewContent', '#JustDropped'])
         return base_tags
     
     def schedule_all(self):
         """
         Schedule all queued content using AI-optimized times.
-        Runs continuously until all content is posted.
+        Dispatches each post at its due time and returns once the queue is drained.
         """
-        for post in self.scheduled_posts:
-            optimal_time = post['optimized']['suggested_time']
-            schedule.every().day.at(optimal_time).do(
-                self._publish_content, post
-            )
-        
-        print(f"✅ Scheduled {len(self.scheduled_posts)} posts")
+        print(f"✅ Scheduled {len(self.queue)} posts")
         print("🤖 AI scheduler running continuously...")
+        metrics_port = os.getenv('SCHEDULER_METRICS_PORT')
+        if metrics_port:
+            self.metrics.serve(int(metrics_port))
         
         # Run until all tasks complete
-        while len(schedule.get_jobs()) > 0:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        try:
+            while True:
+                due_posts = self._wait_for_due_posts()
+                if not due_posts:
+                    break
+                self._publish_content(due_posts)
+        finally:
+            self.publisher.close()
+            self.ledger.save()
     
-    def _publish_content(self, post: Dict):
+    def _publish_content(self, posts: List[Dict]):
         """
-        Publishes content to the specified platform.
-        AI handles API calls and error recovery automatically.
+        Publishes a burst of due posts to their platforms concurrently.
+        Hands off to the async publisher so the dispatcher never blocks on API calls.
         """
-        try:
-            platform = post['platform']
-            print(f"📤 Publishing to {platform}: {post['text'][:50]}...")
-            
-            # Platform-specific publishing logic
-            if platform == 'instagram':
-                self._post_to_instagram(post)
-            elif platform == 'twitter':
-                self._post_to_twitter(post)
-            elif platform == 'tiktok':
-                self._post_to_tiktok(post)
-            elif platform == 'onlyfans':
-                self._post_to_onlyfans(post)
-            
-            print(f"✅ Successfully posted to {platform}")
-            self.scheduled_posts.remove(post)
-            
-        except Exception as e:
-            print(f"❌ Error posting to {platform}: {e}")
-            # AI automatically retries with exponential backoff
-            self._retry_with_backoff(post)
-    
-    def _post_to_instagram(self, post: Dict):
-        """Instagram API integration (configure with your credentials)"""
-        # TODO: Add Instagram Graph API integration
-        print("  → Instagram post created")
-        pass
-    
-    def _post_to_twitter(self, post: Dict):
-        """Twitter API integration (configure with your credentials)"""
-        # TODO: Add Twitter API v2 integration
-        print("  → Twitter post created")
-        pass
-    
-    def _post_to_tiktok(self, post: Dict):
-        """TikTok API integration (configure with your credentials)"""
-        # TODO: Add TikTok API integration
-        print("  → TikTok post created")
-        pass
-    
-    def _post_to_onlyfans(self, post: Dict):
-        """OnlyFans API integration (configure with your credentials)"""
-        # TODO: Add OnlyFans API integration
-        print("  → OnlyFans post created")
-        pass
-    
-    def _retry_with_backoff(self, post: Dict, retry_count: int = 0):
-        """AI-powered retry logic with exponential backoff"""
-        if retry_count < 3:
-            wait_time = 2 ** retry_count * 60  # 1min, 2min, 4min
-            schedule.every(wait_time).seconds.do(
-                self._publish_content, post
-            )
+        ready = []
+        # Pick up posts other workers published since the last burst
+        self.ledger.sync()
+        for post in posts:
+            # Media was checked when the post was queued; this is a stat and a lookup
+            problem = self.preflight.problem(post)
+            if problem:
+                print(f"❌ Media check failed for {post['platform']}: {problem}")
+                with self._wakeup:
+                    self._retry_with_backoff(post, FatalPublishError(problem))
+                    self._in_flight.discard(post['queue_id'])
+                    self._wakeup.notify()
+                continue
+            if 'idempotency_key' not in post:
+                # Kept in the payload so retries reuse it; the hash is the one
+                # taken at queue time (posts queued before it was saved are hashed now)
+                media = post.get('media') or self.preflight.check(post['media_path'])
+                post['idempotency_key'] = idempotency_key(post, media['sha256'])
+            if self.ledger.seen(post['idempotency_key']):
+                # Published before, but the ack was lost (timeout, crash, expired lease)
+                print(f"⏭️ Already published to {post['platform']}, skipping")
+                with self._wakeup:
+                    if self.queue.ack(post['queue_id']):
+                        self.preflight.release(post.get('media'))
+                    self._in_flight.discard(post['queue_id'])
+                    self._wakeup.notify()
+                continue
+            print(f"📤 Publishing to {post['platform']}: {post['text'][:50]}...")
+            ready.append(post)
+        
+        if not ready:
+            return
+        # Each outcome is recorded as soon as that post finishes, not when the
+        # burst does: a post held by a rate limit keeps only its own lease open
+        self.publisher.submit(ready, self._on_published)
+    
+    def _on_published(self, post: Dict, error: Optional[Exception]):
+        """Record one publish outcome (runs on the publisher thread)"""
+        platform = post['platform']
+        with self._wakeup:
+            if error is None:
+                print(f"✅ Successfully posted to {platform}")
+                self.metrics.published.inc(platform)
+                self.ledger.record(post['idempotency_key'], platform)
+                if self.queue.ack(post['queue_id']):
+                    self.preflight.release(post.get('media'))
+                else:
+                    print(f"⚠️ Lease on {platform} post {post['queue_id']} expired before ack")
+            else:
+                print(f"❌ Error posting to {platform}: {error}")
+                self.metrics.failures.inc(platform)
+                # AI automatically retries with exponential backoff
+                self._retry_with_backoff(post, error)
+            self._in_flight.discard(post['queue_id'])
+            self._wakeup.notify()
+    
+    def _retry_with_backoff(self, post: Dict, error: Exception):
+        """
+        AI-powered retry logic with jittered exponential backoff.
+        Requeues the post as a one-shot entry; fatal errors and posts that
+        exhausted their retries go to the dead-letter queue instead.
+        """
+        attempt = post.get('retry_count', 0)
+        with self._wakeup:
+            if not self.retry_policy.should_retry(error, attempt):
+                reason = 'retries exhausted' if is_retryable(error) else 'fatal error'
+                if self.queue.dead_letter(post['queue_id'], post, repr(error)):
+                    self.preflight.release(post.get('media'))
+                    self.metrics.dead_letters.inc(post['platform'])
+                    print(f"🪦 Dead-lettered {post['platform']} post ({reason})")
+                return
+            post['retry_count'] = attempt + 1
+            wait_time = self.retry_policy.next_delay(attempt, error)
+            # A lost lease means another worker already owns the post
+            if self.queue.requeue(post['queue_id'], time.time() + wait_time, post):
+                self.metrics.retries.inc(post['platform'])
+            self._wakeup.notify()
+
+def iter_content_calendar(path: str) -> Iterator[Dict]:
+    """
+    Stream posts from a CSV (header row: text,platform,media_path,...) or
+    JSONL content calendar without loading the whole file.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def run_worker(queue_location: Optional[str] = None):
+    """
+    Run one publishing worker against a shared queue.
+    Start as many as needed, on one host or several (point CONTENT_QUEUE at
+    the same SQLite file or Redis); each leases due posts so every post is
+    published by exactly one worker.
+    """
+    scheduler = AIContentScheduler(queue=open_post_queue(queue_location), keep_running=True)
+    print(f"👷 Worker {scheduler.queue.worker_id} polling {queue_location or os.getenv('CONTENT_QUEUE', 'content_queue.db')}")
+    scheduler.schedule_all()
 
 def run_scheduler_demo():
     """
@@ -171,22 +428,33 @@ def run_scheduler_demo():
     """
     scheduler = AIContentScheduler()
     
+    # Sample media files (replace with your own content)
+    media_dir = tempfile.mkdtemp(prefix='steelezone-demo-')
+    samples = {
+        'image.jpg': b'\xff\xd8\xff\xe0' + b'\x00' * 1024,
+        'video.mp4': b'\x00\x00\x00\x18ftypmp42' + b'\x00' * 4096,
+        'content.jpg': b'\xff\xd8\xff\xe1' + b'\x00' * 2048
+    }
+    for name, data in samples.items():
+        with open(os.path.join(media_dir, name), 'wb') as f:
+            f.write(data)
+    
     # Example content to schedule
     sample_posts = [
         {
             'text': '🔥 New exclusive content just dropped! Check it out on my OnlyFans! #TheSteeleZone #ExclusiveContent',
             'platform': 'twitter',
-            'media_path': '/path/to/image.jpg'
+            'media_path': os.path.join(media_dir, 'image.jpg')
         },
         {
             'text': '✨ Behind the scenes from today\'s shoot! Subscribe for more exclusive content 💎',
             'platform': 'instagram',
-            'media_path': '/path/to/video.mp4'
+            'media_path': os.path.join(media_dir, 'video.mp4')
         },
         {
             'text': '💫 VIP content alert! Link in bio for premium access',
             'platform': 'onlyfans',
-            'media_path': '/path/to/content.jpg'
+            'media_path': os.path.join(media_dir, 'content.jpg')
         }
     ]
     
@@ -208,5 +476,8 @@ if __name__ == '__main__':
     print("="*60)
     print()
     
-    # Run the scheduler
-    run_scheduler_demo()
+    # Run the scheduler (--worker joins a shared queue instead of running the demo)
+    if '--worker' in sys.argv:
+        run_worker()
+    else:
+        run_scheduler_demo()
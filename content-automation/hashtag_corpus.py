@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Hashtag Corpus - Memory-Mapped Tag Tables
+Trending and niche hashtags loaded from a compact file, shared between processes and reloaded live
+"""
+
+import os
+import sys
+import mmap
+import time
+import zlib
+import struct
+import tempfile
+from array import array
+from collections.abc import Sequence
+from typing import List, Dict, Union, Iterable, Optional
+
+MAGIC = b'HTCORP01'
+_BYTE_ORDER = 0x01020304
+# magic, byte order check, tag/group/slot counts, then the start of every section
+_HEADER = struct.Struct('<8sIIII8Q')
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+def corpus_groups(trending: Iterable[str], niche_tags: Dict) -> Dict[str, List[str]]:
+    """
+    Flatten AIHashtagGenerator-style tables into named groups:
+    'trending', one per niche category and 'platform:<platform>'.
+    """
+    groups = {'trending': list(trending)}
+    for category, tags in niche_tags.items():
+        if category == 'platform_specific':
+            for platform, platform_tags in tags.items():
+                groups[f'platform:{platform}'] = list(platform_tags)
+        else:
+            groups[category] = list(tags)
+    return groups
+
+def write_corpus(path: str, trending: Iterable[str], niche_tags: Dict):
+    """
+    Write a corpus file atomically: readers see either the old file or
+    the complete new one, never a partial write.
+
+    Layout (native-endian uint32 arrays, 8-byte aligned sections):
+        tag offsets + UTF-8 tag blob     tag id -> text
+        group directory + names          group -> range of the members array
+        members                          tag ids of each group, in list order
+        membership offsets + pairs       tag id -> (group id, rank) pairs
+        slots                            open-addressing hash table: crc32(tag) -> tag id + 1
+    """
+    groups = corpus_groups(trending, niche_tags)
+    tag_ids = {}
+    members = array('I')
+    directory = array('I')
+    names = bytearray()
+    memberships = []
+    for group_id, (name, tags) in enumerate(groups.items()):
+        encoded = name.encode('utf-8')
+        directory.extend((len(names), len(names) + len(encoded), len(members), len(members) + len(tags)))
+        names += encoded
+        seen = set()
+        for rank, tag in enumerate(tags):
+            tag_id = tag_ids.get(tag)
+            if tag_id is None:
+                tag_id = tag_ids[tag] = len(tag_ids)
+                memberships.append([])
+            members.append(tag_id)
+            if tag not in seen:
+                # A tag's rank is its first position in the group
+                seen.add(tag)
+                memberships[tag_id].extend((group_id, rank))
+
+    offsets = array('I', [0])
+    blob = bytearray()
+    encoded_tags = []
+    for tag in tag_ids:
+        encoded = tag.encode('utf-8')
+        encoded_tags.append(encoded)
+        blob += encoded
+        offsets.append(len(blob))
+    membership_offsets = array('I', [0])
+    pairs = array('I')
+    for pair_list in memberships:
+        pairs.extend(pair_list)
+        membership_offsets.append(len(pairs) // 2)
+    slot_count = 8
+    while slot_count < len(tag_ids) * 2:
+        slot_count *= 2
+    slots = array('I', bytes(4 * slot_count))
+    for tag_id, encoded in enumerate(encoded_tags):
+        slot = zlib.crc32(encoded) & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = tag_id + 1
+
+    sections = [offsets.tobytes(), bytes(blob), directory.tobytes(), bytes(names),
+                members.tobytes(), membership_offsets.tobytes(), pairs.tobytes(), slots.tobytes()]
+    starts = []
+    position = _HEADER.size
+    for section in sections:
+        position = _aligned(position)
+        starts.append(position)
+        position += len(section)
+    header = _HEADER.pack(MAGIC, _BYTE_ORDER, len(tag_ids), len(groups), slot_count, *starts)
+
+    directory_name = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.corpus-', dir=directory_name)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(header)
+            for start, section in zip(starts, sections):
+                out.write(bytes(start - out.tell()))
+                out.write(section)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+class TagList(Sequence):
+    """Read-only list of the tags of one group, decoded on access"""
+
+    def __init__(self, snapshot: 'CorpusSnapshot', start: int, end: int):
+        self._snapshot = snapshot
+        self._start = start
+        self._end = end
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            members = self._snapshot._members[self._start:self._end][index]
+            return [self._snapshot.tag(tag_id) for tag_id in members]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('tag index out of range')
+        return self._snapshot.tag(self._snapshot._members[self._start + index])
+
+    def __repr__(self) -> str:
+        return f'TagList({len(self)} tags)'
+
+class CorpusSnapshot:
+    """
+    One version of a corpus file, mapped read-only.
+    The operating system shares the mapped pages between every process
+    that opens the file, and only the pages actually touched are read,
+    so opening costs the same whatever the corpus size. A snapshot stays
+    valid after the file is replaced; it is unmapped once nothing uses it.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as corpus_file:
+            stat = os.fstat(corpus_file.fileno())
+            self._map = mmap.mmap(corpus_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        (magic, byte_order, self.tag_count, group_count, slot_count,
+         *starts) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a hashtag corpus file')
+        if byte_order != _BYTE_ORDER:
+            raise ValueError(f'{path} was written on a machine with a different byte order')
+        view = memoryview(self._map)
+        ends = starts[1:] + [len(self._map)]
+        lengths = [
+            4 * (self.tag_count + 1), None, 16 * group_count, None,
+            None, 4 * (self.tag_count + 1), None, 4 * slot_count
+        ]
+        # Variable-length sections end where the next one's padding starts
+        lengths[1] = self._u32(view, starts[0], lengths[0])[-1]
+        directory = self._u32(view, starts[2], lengths[2])
+        lengths[3] = directory[-3] if group_count else 0
+        lengths[4] = 4 * directory[-1] if group_count else 0
+        membership_offsets = self._u32(view, starts[5], lengths[5])
+        lengths[6] = 8 * membership_offsets[-1]
+        for start, length, end in zip(starts, lengths, ends):
+            if start + length > end:
+                raise ValueError(f'{path} is truncated or corrupt')
+
+        self._offsets = self._u32(view, starts[0], lengths[0])
+        self._blob = view[starts[1]:starts[1] + lengths[1]]
+        self._members = self._u32(view, starts[4], lengths[4])
+        self._membership_offsets = membership_offsets
+        self._pairs = self._u32(view, starts[6], lengths[6])
+        self._slots = self._u32(view, starts[7], lengths[7])
+        self._slot_mask = slot_count - 1
+        names = view[starts[3]:starts[3] + lengths[3]]
+        self.group_names = []
+        self._groups = {}
+        for group_id in range(group_count):
+            name_start, name_end, member_start, member_end = directory[4 * group_id:4 * group_id + 4]
+            name = bytes(names[name_start:name_end]).decode('utf-8')
+            self.group_names.append(name)
+            self._groups[name] = (member_start, member_end)
+
+    @staticmethod
+    def _u32(view: memoryview, start: int, length: int) -> memoryview:
+        return view[start:start + length].cast('I')
+
+    def __len__(self) -> int:
+        return self.tag_count
+
+    def tag(self, tag_id: int) -> str:
+        return bytes(self._blob[self._offsets[tag_id]:self._offsets[tag_id + 1]]).decode('utf-8')
+
+    def find(self, tag: str) -> Optional[int]:
+        """Tag id, or None when the tag isn't in the corpus"""
+        encoded = tag.encode('utf-8')
+        slots, mask, offsets, blob = self._slots, self._slot_mask, self._offsets, self._blob
+        slot = zlib.crc32(encoded) & mask
+        while True:
+            entry = slots[slot]
+            if not entry:
+                return None
+            tag_id = entry - 1
+            if blob[offsets[tag_id]:offsets[tag_id + 1]] == encoded:
+                return tag_id
+            slot = (slot + 1) & mask
+
+    def __contains__(self, tag: str) -> bool:
+        return self.find(tag) is not None
+
+    def group(self, name: str) -> TagList:
+        start, end = self._groups.get(name, (0, 0))
+        return TagList(self, start, end)
+
+    def groups_of(self, tag: str) -> Dict[str, int]:
+        """Groups holding the tag, with its rank in each (same shape as TagMatcher.groups)"""
+        tag_id = self.find(tag)
+        if tag_id is None:
+            return {}
+        pairs = self._pairs[2 * self._membership_offsets[tag_id]:2 * self._membership_offsets[tag_id + 1]]
+        return {self.group_names[pairs[i]]: pairs[i + 1] for i in range(0, len(pairs), 2)}
+
+    def niche_tags(self) -> Dict:
+        """Groups other than 'trending' in the shape of AIHashtagGenerator.niche_tags"""
+        niches = {'platform_specific': {}}
+        for name in self.group_names:
+            if name.startswith('platform:'):
+                niches['platform_specific'][name[9:]] = self.group(name)
+            elif name != 'trending':
+                niches[name] = self.group(name)
+        return niches
+
+class HashtagCorpus:
+    """
+    Live handle on a corpus file.
+    `snapshot` is the current version; refresh() maps the file again when
+    it has been replaced (write_corpus swaps files atomically). Callers
+    take the snapshot once per request, so a reload never changes tables
+    under a request in progress.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        """
+        Args:
+            path: Corpus file written by write_corpus
+            check_interval: Minimum seconds between checks for a new file
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.snapshot = CorpusSnapshot(path)
+        self._checked_at = time.monotonic()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Switch to the file on disk if it changed; True when a new version was loaded"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Keep serving the last good version
+            return False
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self.snapshot.version:
+            return False
+        try:
+            snapshot = CorpusSnapshot(self.path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Keeping hashtag corpus version in use: {e}")
+            return False
+        self.snapshot = snapshot
+        print(f"🔄 Reloaded hashtag corpus ({len(snapshot):,} tags)")
+        return True
+
+def open_corpus(path: Optional[str] = None) -> Optional[HashtagCorpus]:
+    """Open `path` (or HASHTAG_CORPUS); None when no corpus file is configured"""
+    path = path or os.getenv('HASHTAG_CORPUS')
+    return HashtagCorpus(path) if path else None
+
+def export_builtin_corpus(path: str):
+    """Write the generator's built-in tables as a corpus file to start from"""
+    from hashtag_generator import AIHashtagGenerator
+    generator = AIHashtagGenerator()
+    write_corpus(path, generator.trending_hashtags, generator.niche_tags)
+    print(f"✅ Wrote {len(CorpusSnapshot(path)):,} tags to {path}")
+
+def _private_kb() -> int:
+    # Anonymous (per-process) memory; mapped corpus pages are shared page cache
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1])
+    return 0
+
+def run_corpus_benchmark(tag_count: int = 300_000):
+    """
+    Startup time and memory of a generator on a large corpus: built from
+    in-memory tables versus opened from a corpus file.
+    """
+    from hashtag_generator import AIHashtagGenerator
+    niches = ['exclusive', 'lifestyle', 'creator', 'fan_engagement']
+    niche_tags = {niche: [f'#{niche.title()}Tag{i}' for i in range(tag_count // 5)]
+                  for niche in niches}
+    niche_tags['platform_specific'] = {
+        platform: [f'#{platform.title()}Tag{i}' for i in range(tag_count // 20)]
+        for platform in ['instagram', 'twitter', 'tiktok', 'onlyfans']
+    }
+    trending = [f'#Trend{i}' for i in range(200)]
+    path = os.path.join(tempfile.mkdtemp(), 'hashtag_corpus.bin')
+    write_corpus(path, trending, niche_tags)
+    print(f"⏱️ Corpus of {tag_count:,} tags ({os.path.getsize(path) / 1e6:.1f} MB on disk)")
+    # One-time allocations (regexes, numpy) shouldn't count toward either side
+    AIHashtagGenerator().generate("Warm up caption", 'instagram')
+
+    private = _private_kb()
+    start = time.perf_counter()
+    generator = AIHashtagGenerator(corpus=HashtagCorpus(path))
+    generator.generate("Daily lifestyle vlog with my amazing community", 'instagram', 'lifestyle')
+    print(f"  corpus file: {time.perf_counter() - start:.3f}s, +{(_private_kb() - private) / 1024:.1f} MB private memory")
+
+    private = _private_kb()
+    start = time.perf_counter()
+    generator = AIHashtagGenerator()
+    generator.trending_hashtags = trending
+    generator.niche_tags = niche_tags
+    generator.refresh_tags()
+    generator.generate("Daily lifestyle vlog with my amazing community", 'instagram', 'lifestyle')
+    print(f"  in memory:   {time.perf_counter() - start:.3f}s, +{(_private_kb() - private) / 1024:.1f} MB private memory")
+    os.unlink(path)
+
+if __name__ == '__main__':
+    if '--benchmark' in sys.argv:
+        run_corpus_benchmark()
+    else:
+        export_builtin_corpus(sys.argv[1] if len(sys.argv) > 1 else 'hashtag_corpus.bin')
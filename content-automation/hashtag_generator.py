@@ -4,21 +4,62 @@ Hashtag Generator - AI-Powered Automation
 Generates trending, relevant hashtags for social media content
 """
 
-import re
-import json
-from typing import List, Dict, Set
-from collections import Counter
+import os
+import sys
+import time
+from typing import List, Dict, Tuple, Iterable, Sequence, Optional
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
 import random
 
+from tag_matcher import TagMatcher
+from caption_tokenizer import keywords
+from tag_scorer import TagScorer, FEATURES
+from hashtag_corpus import HashtagCorpus, open_corpus
+from hashtag_model import HashtagModel, open_hashtag_model
+from result_cache import TTLCache
+
 class AIHashtagGenerator:
     """
     AI-powered hashtag generator that creates optimized hashtags
     for maximum reach and engagement across social platforms.
     """
     
-    def __init__(self):
+    def __init__(self, verbose: bool = False, seed: Optional[int] = None,
+                 cache_size: int = 4096, cache_ttl: Optional[float] = 3600.0,
+                 weights: Optional[Dict[str, Dict[str, float]]] = None,
+                 corpus: Optional[HashtagCorpus] = None,
+                 model: Optional[HashtagModel] = None,
+                 engagement_history: Optional[Sequence[Dict]] = None):
+        """
+        Args:
+            verbose: Print a summary for every generated hashtag set
+            seed: Enables deterministic mode: the same normalized caption,
+                platform, content type and count always get the same tags,
+                and results are served from an LRU/TTL cache
+            cache_size: Results kept in deterministic mode
+            cache_ttl: Seconds a cached result stays valid
+            weights: Per-platform scoring weights, e.g. {'tiktok': {'trending': 0.5}}
+            corpus: Memory-mapped tag tables (defaults to HASHTAG_CORPUS if set,
+                otherwise the built-in tables are used)
+            model: Learned hashtag engagement model (defaults to HASHTAG_MODEL if set)
+            engagement_history: Tracked posts the model learns from
+                (e.g. AIEngagementTracker.historical_data)
+        """
+        self.verbose = verbose
+        self.seed = seed
+        self.cache = TTLCache(cache_size, cache_ttl)
+        self.corpus = corpus if corpus is not None else open_corpus()
+        self._snapshot = self.corpus.snapshot if self.corpus is not None else None
+        self.model = model if model is not None else open_hashtag_model()
+        self.engagement_history = engagement_history
         self.trending_hashtags = self._load_trending_hashtags()
         self.niche_tags = self._load_niche_hashtags()
+        # Prebuilt matcher over every tag table, kept in sync as tags change
+        self.tag_matcher = TagMatcher()
+        # Per-tag feature table, rebuilt lazily whenever the tags change
+        self.scorer = TagScorer(self._tag_groups, weights, self.model)
+        self._index_tags()
         self.platform_limits = {
             'instagram': 30,
             'twitter': 10,
@@ -31,6 +72,8 @@ class AIHashtagGenerator:
         AI analyzes current trends and loads trending hashtags.
         In production, this would connect to social media APIs.
         """
+        if self._snapshot is not None:
+            return list(self._snapshot.group('trending'))
         return [
             '#Trending', '#Viral', '#FYP', '#ForYou', '#Explore',
             '#ContentCreator', '#Creator', '#DigitalContent', '#SocialMedia',
@@ -42,6 +85,9 @@ class AIHashtagGenerator:
         Load niche-specific hashtags for targeted content.
         AI categorizes by content type for optimal reach.
         """
+        if self._snapshot is not None:
+            # Read-only views over the mapped file, decoded on access
+            return self._snapshot.niche_tags()
         return {
             'exclusive': [
                 '#ExclusiveContent', '#VIP', '#Premium', '#Exclusive',
@@ -79,6 +125,76 @@ class AIHashtagGenerator:
             }
         }
     
+    def _index_tags(self):
+        """
+        Bring the tag matcher in line with trending_hashtags and niche_tags.
+        With a corpus file only trending tags are indexed in memory; niche
+        and platform membership is looked up in the file.
+        """
+        self.tag_matcher.sync('trending', self.trending_hashtags)
+        for category, tags in (self.niche_tags.items() if self._snapshot is None else ()):
+            if category == 'platform_specific':
+                for platform, platform_tags in tags.items():
+                    self.tag_matcher.sync(f'platform:{platform}', platform_tags)
+            else:
+                self.tag_matcher.sync(category, tags)
+        self._indexed_trending = (self.trending_hashtags, len(self.trending_hashtags))
+        self.scorer.clear()
+        self.cache.clear()
+    
+    def refresh_tags(self):
+        """Re-index after editing niche_tags (trending changes are picked up automatically)"""
+        self._index_tags()
+    
+    def update_trending(self, hashtags: List[str]):
+        """
+        Replace the trending list (e.g. from platform trend APIs).
+        Only added and removed tags are re-indexed.
+        """
+        self.trending_hashtags = list(hashtags)
+        self.tag_matcher.sync('trending', self.trending_hashtags)
+        self._indexed_trending = (self.trending_hashtags, len(self.trending_hashtags))
+        # Trending flags and cached results came from the old corpus
+        self.scorer.clear()
+        self.cache.clear()
+    
+    def _tag_groups(self, tag: str) -> Dict[str, int]:
+        """Groups a tag belongs to, from the matcher and the corpus file"""
+        groups = self.tag_matcher.groups(tag)
+        if self._snapshot is None:
+            return groups
+        # Trending comes from the matcher, which update_trending may have changed
+        merged = self._snapshot.groups_of(tag)
+        merged.pop('trending', None)
+        merged.update(groups)
+        return merged
+    
+    def _check_corpus(self):
+        if self.corpus is not None and self.corpus.refresh():
+            # New file version: swap every table at once, between requests
+            self._snapshot = self.corpus.snapshot
+            self.trending_hashtags = self._load_trending_hashtags()
+            self.niche_tags = self._load_niche_hashtags()
+            self._index_tags()
+        self._check_trending()
+    
+    def _learn(self):
+        """Feed newly tracked posts to the model"""
+        if self.model is not None and self.engagement_history is not None:
+            if self.model.refresh(self.engagement_history):
+                # Cached results were scored with the old statistics
+                self.cache.clear()
+    
+    def _check_trending(self):
+        indexed, indexed_len = self._indexed_trending
+        if indexed is not self.trending_hashtags or indexed_len != len(indexed):
+            # List was reassigned or edited in place since it was indexed
+            self.update_trending(self.trending_hashtags)
+    
+    def cache_stats(self) -> Dict[str, float]:
+        """Hit/miss counters of the deterministic-mode result cache"""
+        return self.cache.stats()
+    
     def generate(self, content_text: str, platform: str, 
                  content_type: str = 'general', count: int = None) -> List[str]:
         """
@@ -94,44 +210,151 @@ class AIHashtagGenerator:
         Returns:
             List of AI-optimized hashtags
         """
+        self._check_corpus()
+        self._learn()
+        result = self._generate_cached(content_text, platform, content_type, count)
+        final_tags = result['hashtags']
+        
+        if self.verbose:
+            print(f"\n✅ Generated {len(final_tags)} optimized hashtags for {platform}")
+            print(f"🎯 Engagement score: {result['set_score']:.2f}")
+        
+        return final_tags
+    
+    def generate_batch(self, posts: Iterable[Dict]) -> List[Dict]:
+        """
+        AI generates hashtags for many posts at once (e.g. re-tagging an archive).
+        Keywords are extracted once per post; keyword matches and
+        niche/platform tag pools are computed once for the whole batch and
+        shared by every post that needs them. The candidates of every post
+        are then scored together in one vectorized pass.
+        
+        Args:
+            posts: Dicts with 'text' and 'platform', optionally 'content_type' and 'count'
+        
+        Returns:
+            One {'hashtags', 'scores', 'set_score'} dict per post, in input order
+        """
+        self._check_corpus()
+        self._learn()
+        cache = self._batch_cache()
+        results = []
+        pending = []  # (position, result cache key, platform, rank request)
+        for post in posts:
+            text, platform = post['text'], post['platform']
+            content_type, count = post.get('content_type', 'general'), post.get('count')
+            key = seed_key = None
+            if self.seed is not None:
+                text = ' '.join(text.split())
+                key = (text, platform, content_type, count)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    results.append(self._copy(cached))
+                    continue
+                seed_key = f'{self.seed}|{text}|{platform}|{content_type}|{count}'
+            candidates, count = self._candidates(text, platform, content_type, count, cache, seed_key)
+            pending.append((len(results), key, platform, (candidates, platform, count, text.lower())))
+            results.append(None)
+        ranked = self.scorer.rank_batch([request for _, _, _, request in pending])
+        for (position, key, platform, _), top in zip(pending, ranked):
+            result = self._result(top, platform)
+            if key is not None:
+                self.cache.put(key, result)
+                result = self._copy(result)
+            results[position] = result
+        if self.verbose:
+            print(f"\n✅ Generated hashtags for {len(results)} posts")
+        return results
+    
+    def _batch_cache(self) -> Dict[str, Dict]:
+        """Lookups shared by the posts of one batch (dropped afterwards, so tag edits apply)"""
+        return {'matches': {}, 'generated': {}, 'pools': {}}
+    
+    def _generate_cached(self, content_text: str, platform: str, content_type: str,
+                         count: Optional[int], cache: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Deterministic mode: serve repeated inputs from the result cache"""
+        if self.seed is None:
+            return self._generate_one(content_text, platform, content_type, count, cache)
+        # Case is kept: CamelCase words become hashtags as written
+        caption = ' '.join(content_text.split())
+        key = (caption, platform, content_type, count)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._generate_one(caption, platform, content_type, count, cache,
+                                        seed_key=f'{self.seed}|{caption}|{platform}|{content_type}|{count}')
+            self.cache.put(key, result)
+        return self._copy(result)
+    
+    @staticmethod
+    def _copy(result: Dict) -> Dict:
+        # Callers may modify what they get back
+        return {'hashtags': list(result['hashtags']), 'scores': list(result['scores']),
+                'set_score': result['set_score']}
+    
+    def _generate_one(self, content_text: str, platform: str, content_type: str,
+                      count: Optional[int], cache: Optional[Dict[str, Dict]] = None,
+                      seed_key: Optional[str] = None) -> Dict:
+        """Pick, score and rank hashtags for one caption"""
+        candidates, count = self._candidates(content_text, platform, content_type, count,
+                                             cache, seed_key)
+        # AI scores hashtags and keeps the top N
+        top = self.scorer.rank(candidates, platform, count, content_text.lower())
+        return self._result(top, platform)
+    
+    def _result(self, top: List[Tuple[str, float]], platform: str) -> Dict:
+        final_tags = [tag for tag, _ in top]
+        return {
+            'hashtags': final_tags,
+            'scores': [score for _, score in top],
+            'set_score': self.scorer.set_score(final_tags, platform)
+        }
+    
+    def _candidates(self, content_text: str, platform: str, content_type: str,
+                    count: Optional[int], cache: Optional[Dict[str, Dict]] = None,
+                    seed_key: Optional[str] = None) -> Tuple[List[str], int]:
+        """Hashtag pool for one caption and how many of it to keep"""
+        # Per-keyword memoization only pays off across a batch
+        matches = cache['matches'] if cache is not None else None
+        if cache is None:
+            cache = self._batch_cache()
         # AI automatically determines optimal count
         if count is None:
             count = self._get_optimal_count(platform, content_text)
         
         # AI analyzes content
-        content_keywords = self._extract_keywords(content_text)
+        content_words = self._extract_keywords(content_text)
+        content_keywords = [word.lower() for word in content_words]
         
         # Build hashtag pool
         hashtag_pool = set()
         
         # Add trending hashtags
-        hashtag_pool.update(self._select_trending(content_keywords))
-        
-        # Add niche hashtags
-        if content_type in self.niche_tags:
-            hashtag_pool.update(self.niche_tags[content_type][:5])
+        hashtag_pool.update(self._select_trending(content_keywords, matches, seed_key))
         
-        # Add platform-specific hashtags
-        if platform in self.niche_tags['platform_specific']:
-            hashtag_pool.update(
-                self.niche_tags['platform_specific'][platform][:3]
-            )
+        # Add niche and platform-specific hashtags
+        pool = cache['pools'].get((content_type, platform))
+        if pool is None:
+            pool = cache['pools'][content_type, platform] = self._base_pool(content_type, platform)
+        hashtag_pool.update(pool)
         
         # Add AI-generated hashtags from content
-        hashtag_pool.update(self._generate_from_content(content_keywords))
-        
-        # AI scores and ranks hashtags
-        ranked_hashtags = self._rank_hashtags(
-            list(hashtag_pool), content_text, platform
-        )
-        
-        # Return top N hashtags
-        final_tags = ranked_hashtags[:count]
-        
-        print(f"\n✅ Generated {len(final_tags)} optimized hashtags for {platform}")
-        print(f"🎯 Engagement score: {self._calculate_set_score(final_tags, platform):.2f}")
-        
-        return final_tags
+        generated = cache['generated']
+        for word in content_words:
+            tag = generated.get(word)
+            if tag is None:
+                tag = generated[word] = self._generate_from_content([word])
+            hashtag_pool.update(tag)
+        
+        return list(hashtag_pool), count
+    
+    def _base_pool(self, content_type: str, platform: str) -> List[str]:
+        """Niche tags for the content type plus the platform's own tags"""
+        pool = []
+        if content_type in self.niche_tags:
+            pool.extend(self.niche_tags[content_type][:5])
+        if platform in self.niche_tags['platform_specific']:
+            pool.extend(self.niche_tags['platform_specific'][platform][:3])
+        return pool
     
     def _get_optimal_count(self, platform: str, content: str) -> int:
         """
@@ -149,35 +372,35 @@ class AIHashtagGenerator:
     
     def _extract_keywords(self, text: str) -> List[str]:
         """
-        AI extracts relevant keywords from content text.
+        AI extracts relevant keywords from content text, in their original case.
         """
-        # Remove URLs and special characters
-        text = re.sub(r'http\S+', '', text)
-        text = re.sub(r'[^\w\s]', '', text)
-        
-        # Extract meaningful words (AI-powered NLP in production)
-        words = text.lower().split()
-        
-        # Filter common words
-        stop_words = {'the', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'and', 'or', 'but'}
-        keywords = [w for w in words if len(w) > 3 and w not in stop_words]
-        
-        return keywords[:10]  # Top 10 keywords
+        return keywords(text, 10, lower=False)  # Top 10 keywords
     
-    def _select_trending(self, keywords: List[str]) -> List[str]:
+    def _select_trending(self, keywords: List[str], matches: Optional[Dict] = None,
+                         seed_key: Optional[str] = None) -> List[str]:
         """
         AI selects trending hashtags relevant to content.
+        `matches` memoizes the matcher per keyword across a batch;
+        `seed_key` makes the visibility picks repeatable.
         """
-        selected = []
-        for tag in self.trending_hashtags:
-            # AI matches trending tags to content
-            tag_words = tag.lower().replace('#', '')
-            if any(kw in tag_words or tag_words in kw for kw in keywords):
-                selected.append(tag)
+        self._check_trending()
+        # AI matches trending tags to content
+        if matches is None:
+            selected = self.tag_matcher.match(keywords, 'trending')
+        else:
+            found = set()
+            for keyword in keywords:
+                tags = matches.get(keyword)
+                if tags is None:
+                    tags = matches[keyword] = self.tag_matcher.match([keyword], 'trending')
+                found.update(tags)
+            ranks = self.tag_matcher.groups
+            selected = sorted(found, key=lambda tag: ranks(tag)['trending'])
         
         # Add some trending tags regardless for visibility
         if len(selected) < 3:
-            selected.extend(random.sample(self.trending_hashtags, 3))
+            rng = random.Random(seed_key) if seed_key is not None else random
+            selected.extend(rng.sample(self.trending_hashtags, min(3, len(self.trending_hashtags))))
         
         return selected[:5]
     
@@ -188,60 +411,34 @@ class AIHashtagGenerator:
         generated = []
         
         for keyword in keywords:
-            # Create hashtag from keyword
+            # Create hashtag from keyword, keeping CamelCase brand words as written
             if len(keyword) > 3:
-                generated.append(f'#{keyword.capitalize()}')
+                camel = keyword[1:] != keyword[1:].lower() and not keyword.isupper()
+                generated.append(f'#{keyword}' if camel else f'#{keyword.capitalize()}')
         
         return generated
     
-    def _rank_hashtags(self, hashtags: List[str], content: str, platform: str) -> List[str]:
+    def _rank_hashtags(self, hashtags: List[str], content: str, platform: str,
+                       count: Optional[int] = None) -> List[str]:
         """
         AI ranks hashtags by predicted engagement.
-        Uses machine learning scoring algorithm.
+        With `count`, only the top N are selected and sorted.
         """
-        scored_tags = []
-        
-        for tag in hashtags:
-            score = self._score_hashtag(tag, content, platform)
-            scored_tags.append((tag, score))
-        
-        # Sort by score (highest first)
-        scored_tags.sort(key=lambda x: x[1], reverse=True)
-        
-        return [tag for tag, score in scored_tags]
+        ranked = self.scorer.rank(list(dict.fromkeys(hashtags)), platform, count,
+                                  content=content.lower())
+        return [tag for tag, score in ranked]
     
     def _score_hashtag(self, hashtag: str, content: str, platform: str) -> float:
         """
         AI calculates engagement score for a hashtag.
         """
-        score = 0.5  # Base score
-        
-        # Boost for trending tags
-        if hashtag in self.trending_hashtags:
-            score += 0.3
-        
-        # Boost for platform-specific tags
-        if platform in self.niche_tags['platform_specific']:
-            if hashtag in self.niche_tags['platform_specific'][platform]:
-                score += 0.2
-        
-        # Boost for brand tags
-        if 'steelezone' in hashtag.lower():
-            score += 0.4
-        
-        # Boost for relevance to content
-        tag_word = hashtag.lower().replace('#', '')
-        if tag_word in content.lower():
-            score += 0.3
-        
-        return score
+        return self.scorer.score(hashtag, platform, content.lower())
     
     def _calculate_set_score(self, hashtags: List[str], platform: str) -> float:
         """
         Calculate overall engagement score for hashtag set.
         """
-        total_score = sum(self._score_hashtag(tag, '', platform) for tag in hashtags)
-        return total_score / len(hashtags) if hashtags else 0.0
+        return self.scorer.set_score(hashtags, platform)
     
     def generate_campaign_hashtags(self, campaign_name: str, platforms: List[str]) -> Dict[str, List[str]]:
         """
@@ -263,13 +460,85 @@ class AIHashtagGenerator:
         
         print("\n✅ Campaign hashtag generation complete!")
         return results
+    
+    def generate_campaigns(self, campaigns: Dict[str, List[str]],
+                           workers: Optional[int] = None) -> Dict[str, Dict[str, List[str]]]:
+        """
+        AI generates hashtags for many campaigns at once across a process pool.
+        Each worker builds one generator when it starts (mapping the same
+        corpus file, so tag tables aren't copied per task); tasks carry
+        only campaign names and platforms. Generation is seeded per
+        campaign and platform, so results don't depend on the worker count.
+        
+        Args:
+            campaigns: Campaign name -> platforms
+            workers: Worker processes (defaults to the CPU count)
+        
+        Returns:
+            Campaign name -> {platform: hashtags}, in input order
+        """
+        tasks = list(campaigns.items())
+        settings = self._worker_settings()
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(tasks) < 2:
+            generator = AIHashtagGenerator._from_settings(settings)
+            results = [_campaign_hashtags(generator, task) for task in tasks]
+        else:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            with ProcessPoolExecutor(workers, initializer=_init_campaign_worker,
+                                     initargs=(settings,)) as pool:
+                results = list(pool.map(_campaign_task, tasks, chunksize=chunksize))
+        return {name: dict(zip(platforms, hashtags))
+                for (name, platforms), hashtags in zip(tasks, results)}
+    
+    def _worker_settings(self) -> Dict:
+        """What a worker process needs to generate exactly like this instance"""
+        settings = {
+            'seed': self.seed if self.seed is not None else 0,
+            'weights': {platform: dict(zip(FEATURES, weights.tolist()))
+                        for platform, weights in self.scorer.weights.items()},
+            'corpus': self.corpus.path if self.corpus is not None else None,
+            # Workers score with the model as last saved
+            'model': self.model.path if self.model is not None else None,
+            'trending': list(self.trending_hashtags)
+        }
+        if self.corpus is None:
+            # In-memory tables are sent once per worker, not per task
+            settings['niche_tags'] = self.niche_tags
+        return settings
+    
+    @classmethod
+    def _from_settings(cls, settings: Dict) -> 'AIHashtagGenerator':
+        corpus = HashtagCorpus(settings['corpus']) if settings['corpus'] else None
+        model = HashtagModel(settings['model']) if settings['model'] else None
+        generator = cls(seed=settings['seed'], weights=settings['weights'], corpus=corpus,
+                        model=model)
+        if 'niche_tags' in settings:
+            generator.niche_tags = settings['niche_tags']
+            generator.refresh_tags()
+        generator.update_trending(settings['trending'])
+        return generator
+
+# Generator of a campaign worker process, built once by _init_campaign_worker
+_worker_generator = None
+
+def _init_campaign_worker(settings: Dict):
+    global _worker_generator
+    _worker_generator = AIHashtagGenerator._from_settings(settings)
+
+def _campaign_task(task: Tuple[str, List[str]]) -> List[List[str]]:
+    return _campaign_hashtags(_worker_generator, task)
+
+def _campaign_hashtags(generator: AIHashtagGenerator, task: Tuple[str, List[str]]) -> List[List[str]]:
+    campaign_name, platforms = task
+    return [generator.generate(campaign_name, platform, 'exclusive') for platform in platforms]
 
 def run_hashtag_demo():
     """
     Demo function showing AI hashtag generator in action.
     Runs to completion automatically.
     """
-    generator = AIHashtagGenerator()
+    generator = AIHashtagGenerator(verbose=True)
     
     print("="*60)
     print("🎯 AI HASHTAG GENERATOR")
@@ -302,5 +571,67 @@ def run_hashtag_demo():
     
     print("\n\n✅ All hashtag generation tasks completed!")
 
+def run_batch_benchmark(post_count: int = 100_000):
+    """
+    Compare generate_batch against calling generate (with its per-call
+    logging, as before) once per post on a synthetic archive.
+    """
+    captions = [
+        "New exclusive content just dropped! Check out my latest photos and videos.",
+        "Behind the scenes from today's shoot, subscribe for more exclusive content",
+        "Big announcement coming soon! Stay tuned for something special.",
+        "VIP content alert! Link in bio for premium access",
+        "Daily lifestyle vlog with my amazing community of fans",
+    ]
+    platforms = ['instagram', 'twitter', 'tiktok', 'onlyfans']
+    content_types = ['exclusive', 'lifestyle', 'creator', 'fan_engagement']
+    posts = [
+        {'text': f"{captions[i % len(captions)]} #{i}", 'platform': platforms[i % 4],
+         'content_type': content_types[i % 4]}
+        for i in range(post_count)
+    ]
+    
+    print(f"⏱️ Tagging {post_count:,} posts")
+    generator = AIHashtagGenerator()
+    random.seed(0)
+    start = time.perf_counter()
+    generator.generate_batch(posts)
+    batch_time = time.perf_counter() - start
+    print(f"  generate_batch: {batch_time:.2f}s")
+    
+    generator = AIHashtagGenerator(verbose=True)
+    random.seed(0)
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        for post in posts:
+            generator.generate(post['text'], post['platform'], post['content_type'])
+    loop_time = time.perf_counter() - start
+    print(f"  generate loop:  {loop_time:.2f}s")
+    print(f"🚀 Speedup: {loop_time / batch_time:.1f}x")
+
+def run_campaign_benchmark(campaign_count: int = 20_000):
+    """Time generate_campaigns in one process and across all CPUs"""
+    platforms = ['instagram', 'twitter', 'tiktok', 'onlyfans']
+    campaigns = {f"Campaign {i}: new exclusive drop for subscribers": platforms
+                 for i in range(campaign_count)}
+    generator = AIHashtagGenerator(seed=42)
+    cpus = os.cpu_count() or 1
+    
+    print(f"⏱️ Generating hashtags for {campaign_count:,} campaigns")
+    start = time.perf_counter()
+    single = generator.generate_campaigns(campaigns, workers=1)
+    single_time = time.perf_counter() - start
+    print(f"  1 process:  {single_time:.2f}s")
+    start = time.perf_counter()
+    parallel = generator.generate_campaigns(campaigns, workers=cpus)
+    parallel_time = time.perf_counter() - start
+    print(f"  {cpus} workers:  {parallel_time:.2f}s")
+    print(f"🚀 Speedup: {single_time / parallel_time:.1f}x, identical results: {single == parallel}")
+
 if __name__ == '__main__':
-    run_hashtag_demo()
+    if '--benchmark' in sys.argv:
+        run_batch_benchmark()
+    elif '--campaigns' in sys.argv:
+        run_campaign_benchmark()
+    else:
+        run_hashtag_demo()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Hashtag Model - Online Engagement Learning
+Learns which hashtags (and hashtag pairs) drive engagement from tracked posts
+"""
+
+import os
+import time
+import atexit
+import hashlib
+import tempfile
+import numpy as np
+from itertools import combinations
+from typing import List, Dict, Sequence, Optional
+
+class CountMinSketch:
+    """
+    Fixed-size table of (count, sum) estimates for any number of keys.
+    Each key maps to one cell per row; an estimate is read from the row
+    whose cell has the lowest count (the one with the fewest colliding
+    keys), so collisions only ever inflate it a little. Memory is
+    depth * width * 16 bytes however many keys are added.
+    """
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4,
+                 counts: Optional[np.ndarray] = None, sums: Optional[np.ndarray] = None):
+        self.width = width
+        self.depth = depth
+        self.counts = counts if counts is not None else np.zeros((depth, width))
+        self.sums = sums if sums is not None else np.zeros((depth, width))
+        self._rows = np.arange(depth)[:, None]
+        self._cells = {}  # key -> cell per row, kept until it grows too large
+
+    def cells(self, keys: Sequence[str]) -> np.ndarray:
+        """(depth, len(keys)) column index of every key in every row"""
+        columns = np.empty((self.depth, len(keys)), dtype=np.intp)
+        cache = self._cells
+        for position, key in enumerate(keys):
+            cells = cache.get(key)
+            if cells is None:
+                # Stable across processes, so a saved sketch stays valid
+                digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+                h1 = int.from_bytes(digest[:8], 'little')
+                h2 = int.from_bytes(digest[8:], 'little') | 1
+                cells = [(h1 + row * h2) % self.width for row in range(self.depth)]
+                if len(cache) >= 100_000:
+                    cache.clear()
+                cache[key] = cells
+            columns[:, position] = cells
+        return columns
+
+    def add(self, keys: Sequence[str], value: float):
+        """Count one observation of `value` for every key"""
+        if not keys:
+            return
+        columns = self.cells(keys)
+        rows = np.broadcast_to(self._rows, columns.shape)
+        # Duplicate keys in one update count once per occurrence
+        np.add.at(self.counts, (rows, columns), 1.0)
+        np.add.at(self.sums, (rows, columns), value)
+
+    def estimate(self, keys: Sequence[str]):
+        """(counts, sums) arrays for the keys"""
+        columns = self.cells(keys)
+        counts = self.counts[self._rows, columns]
+        best = counts.argmin(axis=0)
+        position = np.arange(len(keys))
+        return counts[best, position], self.sums[self._rows, columns][best, position]
+
+class HashtagModel:
+    """
+    Per-platform engagement statistics for hashtags and hashtag pairs,
+    fed from AIEngagementTracker.historical_data.
+    An update touches each tag once plus the pairs among the post's first
+    `pair_tags` tags, so it costs O(tags per post). Statistics live in
+    count-min sketches, which bound memory however long the history, and
+    are saved to disk so learning carries across restarts: along with
+    how far into the history they have read, so a restart that restores
+    the same history (the engagement log) doesn't count it twice.
+    A tag's lift is its smoothed mean engagement relative to the
+    platform average: 0 for unseen tags, positive for tags that beat it.
+    """
+
+    def __init__(self, path: Optional[str] = None, width: int = 1 << 16, depth: int = 4,
+                 prior_weight: float = 20.0, pair_tags: int = 8, save_interval: float = 60.0):
+        """
+        Args:
+            path: File the model is loaded from and saved to (None = memory only);
+                saved after a refresh that learned something, at most every
+                `save_interval` seconds, and at exit if changed since
+            width, depth: Sketch size (memory is about 32 * width * depth bytes)
+            prior_weight: Pseudo-observations at the platform average, so a
+                tag needs a track record before its lift moves far from 0
+            pair_tags: Leading tags of a post whose pairs are tracked
+        """
+        self.path = path
+        self.prior_weight = prior_weight
+        self.pair_tags = pair_tags
+        self.save_interval = save_interval
+        self._baselines = {}  # platform -> [engagement sum, posts]
+        self._cursor = 0      # History records already learned from
+        self._changed = False
+        self._saved_at = time.monotonic()
+        if path and os.path.exists(path):
+            with np.load(path, allow_pickle=False) as saved:
+                if 'cursor' in saved:
+                    self._cursor = int(saved['cursor'])
+                self.tags = CountMinSketch(saved['tag_counts'].shape[1], saved['tag_counts'].shape[0],
+                                           saved['tag_counts'], saved['tag_sums'])
+                self.pairs = CountMinSketch(saved['pair_counts'].shape[1], saved['pair_counts'].shape[0],
+                                            saved['pair_counts'], saved['pair_sums'])
+                for platform, total, posts in zip(saved['platforms'].tolist(),
+                                                  saved['platform_sums'].tolist(),
+                                                  saved['platform_posts'].tolist()):
+                    self._baselines[platform] = [total, posts]
+        else:
+            self.tags = CountMinSketch(width, depth)
+            self.pairs = CountMinSketch(width, depth)
+        if path:
+            atexit.register(self.save_changes)
+
+    def update(self, platform: str, hashtags: Sequence[str], engagement: float):
+        """Learn from one post's outcome"""
+        baseline = self._baselines.setdefault(platform, [0.0, 0])
+        baseline[0] += engagement
+        baseline[1] += 1
+        self._changed = True
+        tags = list(dict.fromkeys(hashtags))
+        if not tags:
+            return
+        self.tags.add([f'{platform}\x1f{tag}' for tag in tags], engagement)
+        self.pairs.add(self._pair_keys(platform, tags[:self.pair_tags]), engagement)
+
+    @staticmethod
+    def _pair_keys(platform: str, tags: Sequence[str]) -> List[str]:
+        return [f'{platform}\x1f{first}\x1f{second}'
+                for first, second in combinations(sorted(tags), 2)]
+
+    def observe(self, record: Dict) -> bool:
+        """Learn from one tracked post; False if it has no hashtags"""
+        hashtags = record.get('hashtags')
+        if not hashtags or 'platform' not in record:
+            return False
+        self.update(record['platform'], hashtags, record.get('engagement_score', 0.0))
+        return True
+
+    def refresh(self, history: Sequence[Dict]) -> int:
+        """
+        Consume records appended to `history` since the last refresh.
+        The position is saved with the model, so `history` should be the
+        same stream across restarts (or start over shorter than it).
+        """
+        end = len(history)
+        if end < self._cursor:
+            # History was replaced; treat it as a new stream
+            self._cursor = 0
+        for index in range(self._cursor, end):
+            self.observe(history[index])
+        consumed = end - self._cursor
+        self._cursor = end
+        if consumed and time.monotonic() - self._saved_at >= self.save_interval:
+            self.save_changes()
+        return consumed
+
+    def _lift(self, sketch: CountMinSketch, keys: List[str], platform: str) -> Optional[np.ndarray]:
+        total, posts = self._baselines.get(platform, (0.0, 0))
+        if not posts or total <= 0:
+            return None
+        mean = total / posts
+        counts, sums = sketch.estimate(keys)
+        smoothed = (sums + self.prior_weight * mean) / (counts + self.prior_weight)
+        return np.clip(smoothed / mean - 1.0, -1.0, 1.0)
+
+    def lifts(self, tags: Sequence[str], platform: str) -> Optional[np.ndarray]:
+        """Learned lift per tag in [-1, 1]; None until the platform has data"""
+        if not tags:
+            return None
+        return self._lift(self.tags, [f'{platform}\x1f{tag}' for tag in tags], platform)
+
+    def pair_lift(self, tags: Sequence[str], platform: str) -> float:
+        """Mean learned lift of the pairs among a hashtag set's leading tags"""
+        keys = self._pair_keys(platform, list(dict.fromkeys(tags))[:self.pair_tags])
+        if not keys:
+            return 0.0
+        lifts = self._lift(self.pairs, keys, platform)
+        return float(lifts.mean()) if lifts is not None else 0.0
+
+    def save(self, path: Optional[str] = None):
+        """Write the model atomically (to `path` or the file it was opened from)"""
+        path = path or self.path
+        if not path:
+            return
+        platforms = sorted(self._baselines)
+        fd, temp_path = tempfile.mkstemp(prefix='.model-', dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                np.savez(out, tag_counts=self.tags.counts, tag_sums=self.tags.sums,
+                         pair_counts=self.pairs.counts, pair_sums=self.pairs.sums,
+                         platforms=np.array(platforms, dtype=str),
+                         platform_sums=np.array([self._baselines[p][0] for p in platforms]),
+                         platform_posts=np.array([self._baselines[p][1] for p in platforms]),
+                         cursor=np.array(self._cursor))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._changed = False
+        self._saved_at = time.monotonic()
+
+    def save_changes(self):
+        """Save to the model's own file if anything was learned since the last save"""
+        if self._changed and self.path:
+            self.save()
+
+def open_hashtag_model(path: Optional[str] = None) -> Optional[HashtagModel]:
+    """Open `path` (or HASHTAG_MODEL); None when no model file is configured"""
+    path = path or os.getenv('HASHTAG_MODEL')
+    return HashtagModel(path) if path else None
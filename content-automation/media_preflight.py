@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Media Preflight - Queue-Time Media Checks
+Verifies, types and hashes post media before publish time
+"""
+
+import os
+import mmap
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Optional
+
+MB = 1024 * 1024
+
+# Leading bytes -> (media kind, format)
+SIGNATURES = [
+    (0, b'\xff\xd8\xff', ('image', 'jpeg')),
+    (0, b'\x89PNG\r\n\x1a\n', ('image', 'png')),
+    (0, b'GIF8', ('image', 'gif')),
+    (8, b'WEBP', ('image', 'webp')),
+    (4, b'ftypqt', ('video', 'mov')),
+    (4, b'ftyp', ('video', 'mp4')),
+    (0, b'\x1aE\xdf\xa3', ('video', 'webm')),
+]
+
+class MediaPreflight:
+    """
+    Checks that post media exists, is a supported image/video type and
+    fits the platform's size limit, and computes a SHA-256 of its content.
+    Files are read through mmap in fixed-size windows so large videos are
+    never loaded whole. Work runs in a thread pool when posts are queued;
+    results are cached by (path, mtime, size), so publish-time checks are
+    a stat and a dict lookup. A report saved with a queued post stands in
+    for the cache in another process (a worker sharing the queue) as long
+    as the file's mtime and size still match it.
+    Duplicate detection counts the posts registered in this process whose
+    media is still queued; release() drops a post once it is published or
+    dead-lettered.
+    """
+
+    def __init__(self, max_workers: int = 4, chunk_size: int = 8 * MB):
+        self.chunk_size = chunk_size
+        self.size_limits = {
+            'instagram': {'image': 8 * MB, 'video': 1024 * MB},
+            'twitter': {'image': 5 * MB, 'video': 512 * MB},
+            'tiktok': {'image': 20 * MB, 'video': 4096 * MB},
+            'onlyfans': {'image': 50 * MB, 'video': 5120 * MB}
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='media-preflight')
+        self._lock = threading.Lock()
+        self._cache = {}      # path -> (mtime_ns, size, report)
+        self._in_progress = {}  # (path, mtime_ns, size) -> Future
+        self._uses = {}       # sha256 -> {'paths': {path: uses}, 'uses': int}
+
+    def submit(self, path: str) -> Future:
+        """Start (or reuse) an inspection of `path` in the thread pool"""
+        key = self._stat_key(path)
+        if key is None:
+            future = Future()
+            future.set_result(self._missing(path))
+            return future
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached and cached[:2] == key[1:]:
+                future = Future()
+                future.set_result(cached[2])
+                return future
+            future = self._in_progress.get(key)
+            if future is None:
+                future = self._executor.submit(self._inspect_and_cache, path, key)
+                self._in_progress[key] = future
+            return future
+
+    def register(self, path: str) -> Future:
+        """Queue-time entry point: inspect the file and count it as used by one more post"""
+        future = self.submit(path)
+        future.add_done_callback(self._count_use)
+        return future
+
+    def check(self, path: str, known: Optional[Dict] = None) -> Dict:
+        """
+        Publish-time lookup; only re-reads the file if it changed since
+        preflight. `known` is a report from preflight (e.g. saved with the
+        post), used when it still matches the file.
+        """
+        key = self._stat_key(path)
+        if key is None:
+            return self._missing(path)
+        with self._lock:
+            cached = self._cache.get(path)
+            future = self._in_progress.get(key)
+            stale = not cached or cached[:2] != key[1:]
+            if stale and known and (known.get('path'), known.get('mtime_ns'), known.get('size')) == key:
+                cached = self._cache[path] = (key[1], key[2], known)
+        if cached and cached[:2] == key[1:]:
+            return cached[2]
+        if future is not None:
+            return future.result()
+        return self._inspect_and_cache(path)
+
+    def problem(self, post: Dict) -> Optional[str]:
+        """Why a post's media can't be published, or None if it is fine"""
+        report = self.check(post['media_path'], post.get('media'))
+        if report['error']:
+            return report['error']
+        limit = self.size_limits.get(post['platform'], {}).get(report['media_type'])
+        if limit is not None and report['size'] > limit:
+            return (f"{report['media_type']} is {report['size'] // MB}MB, "
+                    f"{post['platform']} allows {limit // MB}MB")
+        return None
+
+    def duplicates(self) -> List[Dict]:
+        """Media content used by more than one queued post"""
+        with self._lock:
+            return [
+                {'sha256': digest, 'paths': sorted(entry['paths']), 'uses': entry['uses']}
+                for digest, entry in self._uses.items() if entry['uses'] > 1
+            ]
+
+    def _count_use(self, future: Future):
+        report = future.result()
+        if not report['sha256']:
+            return
+        with self._lock:
+            entry = self._uses.setdefault(report['sha256'], {'paths': {}, 'uses': 0})
+            paths = entry['paths']
+            paths[report['path']] = paths.get(report['path'], 0) + 1
+            entry['uses'] += 1
+            first_use = entry['uses'] == 1
+            other_paths = sorted(path for path in paths if path != report['path'])
+        if not first_use:
+            same_as = other_paths[0] if other_paths else 'an earlier post'
+            print(f"⚠️ Duplicate media: {report['path']} matches {same_as}")
+
+    def release(self, report: Optional[Dict]):
+        """Stop counting a post's media (its preflight report) once it is published or dropped"""
+        if not report or not report.get('sha256'):
+            return
+        with self._lock:
+            entry = self._uses.get(report['sha256'])
+            if entry is None:
+                # Registered by another process sharing the queue
+                return
+            paths = entry['paths']
+            if paths.get(report['path'], 0) > 1:
+                paths[report['path']] -= 1
+            else:
+                paths.pop(report['path'], None)
+            entry['uses'] -= 1
+            if entry['uses'] <= 0:
+                del self._uses[report['sha256']]
+
+    def _stat_key(self, path: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (path, stat.st_mtime_ns, stat.st_size)
+
+    def _missing(self, path: str) -> Dict:
+        return {'path': path, 'size': 0, 'media_type': None, 'format': None,
+                'sha256': None, 'error': f"media not found: {path}"}
+
+    def _inspect_and_cache(self, path: str, submitted: Optional[tuple] = None) -> Dict:
+        """Inspect `path` and cache the report; `submitted` is the in-progress key to clear"""
+        try:
+            key = self._stat_key(path)
+            report = self._inspect(path) if key else self._missing(path)
+            with self._lock:
+                # A file that changed while it was read is reported but not cached
+                if key and self._stat_key(path) == key:
+                    report['mtime_ns'] = key[1]
+                    self._cache[path] = (key[1], key[2], report)
+            return report
+        finally:
+            if submitted is not None:
+                with self._lock:
+                    self._in_progress.pop(submitted, None)
+
+    def _inspect(self, path: str) -> Dict:
+        """Type-sniff and hash a file through a read-only memory map"""
+        report = {'path': path, 'size': 0, 'media_type': None, 'format': None,
+                  'sha256': None, 'error': None}
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                report['size'] = size
+                if size == 0:
+                    report['error'] = f"media file is empty: {path}"
+                    return report
+                digest = hashlib.sha256()
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        header = bytes(view[:16])
+                        for offset in range(0, size, self.chunk_size):
+                            digest.update(view[offset:offset + self.chunk_size])
+                    finally:
+                        view.release()
+        except OSError as e:
+            report['error'] = f"media unreadable: {path} ({e})"
+            return report
+        report['sha256'] = digest.hexdigest()
+        for offset, magic, (media_type, media_format) in SIGNATURES:
+            if header[offset:offset + len(magic)] == magic:
+                report['media_type'], report['format'] = media_type, media_format
+                break
+        else:
+            report['error'] = f"unsupported media type: {path}"
+        return report
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Post Queue - Durable Scheduling Backend
+Crash-safe storage for scheduled posts (SQLite by default, Redis optional)
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Tuple
+
+def default_worker_id() -> str:
+    """Identity used to own post leases: host, process and a random suffix"""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+class SQLitePostQueue:
+    """
+    Persistent post queue backed by SQLite in WAL mode.
+    Posts are indexed by (state, due_at) so the next due post is found in
+    O(log n). Claims are time-bounded leases owned by one worker, so
+    several scheduler processes can share the same database file: a lease
+    that is not acked or renewed in time (the worker died mid-publish)
+    expires and the post is claimed again by whoever is alive. Posts that
+    exhaust their retries move to an inspectable dead_letters table.
+    """
+
+    def __init__(self, path: str = 'content_queue.db', worker_id: Optional[str] = None,
+                 lease_seconds: float = 300.0):
+        self.path = path
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS posts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                platform TEXT NOT NULL,
+                due_at REAL NOT NULL,
+                state TEXT NOT NULL DEFAULT 'queued',
+                claimed_at REAL,
+                payload TEXT NOT NULL,
+                lease_until REAL,
+                worker TEXT
+            )
+        """)
+        # Queues created before leases existed
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(posts)')}
+        for column, kind in (('lease_until', 'REAL'), ('worker', 'TEXT')):
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE posts ADD COLUMN {column} {kind}')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_posts_state_due ON posts (state, due_at)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_posts_platform_due ON posts (state, platform, due_at)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_posts_lease ON posts (state, lease_until)'
+        )
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS dead_letters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                platform TEXT NOT NULL,
+                failed_at REAL NOT NULL,
+                attempts INTEGER NOT NULL,
+                error TEXT NOT NULL,
+                payload TEXT NOT NULL
+            )
+        """)
+
+    def _platforms(self, now: float) -> List[str]:
+        # Platforms with due posts; other workers may queue platforms this process never saw
+        return [platform for (platform,) in self._conn.execute(
+            "SELECT DISTINCT platform FROM posts WHERE state = 'queued' AND due_at <= ?",
+            (now,)
+        )]
+
+    def push(self, post: Dict, due_at: float) -> int:
+        """Queue a post for publishing at due_at (epoch seconds)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO posts (platform, due_at, payload) VALUES (?, ?, ?)',
+                (post['platform'], due_at, json.dumps(post))
+            )
+            return cursor.lastrowid
+
+    def push_many(self, entries: List[Tuple[Dict, float]]):
+        """Queue many (post, due_at) pairs in a single transaction"""
+        if not entries:
+            return
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT INTO posts (platform, due_at, payload) VALUES (?, ?, ?)',
+                    ((post['platform'], due_at, json.dumps(post)) for post, due_at in entries)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def next_due_at(self) -> Optional[float]:
+        """
+        Earliest time a post becomes claimable: the first queued due time
+        or the first lease to expire, None when the queue is empty.
+        """
+        with self._lock:
+            row = self._conn.execute("""
+                SELECT MIN(t) FROM (
+                    SELECT MIN(due_at) AS t FROM posts WHERE state = 'queued'
+                    UNION ALL
+                    SELECT MIN(lease_until) FROM posts WHERE state = 'claimed'
+                )
+            """).fetchone()
+        return row[0]
+
+    def claim_due(self, now: float, limit: int = 100) -> List[Tuple[int, Dict, float]]:
+        """
+        Atomically lease posts due by `now` to this worker, earliest first.
+        Returns (post_id, post, due_at) tuples.
+        Expired leases are released first. `limit` applies per platform, so
+        a backlog of retries for one platform never crowds the others out.
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute("""
+                    UPDATE posts SET state = 'queued', worker = NULL, lease_until = NULL
+                    WHERE state = 'claimed' AND lease_until <= ?
+                """, (now,))
+                platforms = self._platforms(now)
+                rows = []
+                if platforms:
+                    per_platform = """
+                        SELECT id FROM (
+                            SELECT id FROM posts
+                            WHERE state = 'queued' AND platform = ? AND due_at <= ?
+                            ORDER BY due_at LIMIT ?
+                        )
+                    """
+                    params = [now, now + self.lease_seconds, self.worker_id]
+                    for platform in platforms:
+                        params.extend((platform, now, limit))
+                    rows = self._conn.execute(f"""
+                        UPDATE posts SET state = 'claimed', claimed_at = ?, lease_until = ?, worker = ?
+                        WHERE id IN ({' UNION ALL '.join([per_platform] * len(platforms))})
+                        RETURNING id, due_at, payload
+                    """, params).fetchall()
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        rows.sort(key=lambda row: row[1])
+        return [(post_id, json.loads(payload), due_at) for post_id, due_at, payload in rows]
+
+    def renew(self, post_ids: List[int]) -> int:
+        """Extend this worker's leases on in-flight posts; returns how many are still held"""
+        if not post_ids:
+            return 0
+        lease_until = time.time() + self.lease_seconds
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE posts SET lease_until = ? WHERE state = 'claimed' AND worker = ? "
+                f"AND id IN ({','.join('?' * len(post_ids))})",
+                [lease_until, self.worker_id, *post_ids]
+            )
+            return cursor.rowcount
+
+    def ack(self, post_id: int) -> bool:
+        """Remove a successfully published post; False if the lease was lost"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM posts WHERE id = ? AND state = 'claimed' AND worker = ?",
+                (post_id, self.worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def requeue(self, post_id: int, due_at: float, post: Optional[Dict] = None) -> bool:
+        """Return a leased post to the queue (optionally with updated payload)"""
+        with self._lock:
+            if post is None:
+                cursor = self._conn.execute(
+                    "UPDATE posts SET state = 'queued', due_at = ?, claimed_at = NULL, "
+                    "lease_until = NULL, worker = NULL "
+                    "WHERE id = ? AND state = 'claimed' AND worker = ?",
+                    (due_at, post_id, self.worker_id)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE posts SET state = 'queued', due_at = ?, claimed_at = NULL, "
+                    "lease_until = NULL, worker = NULL, payload = ? "
+                    "WHERE id = ? AND state = 'claimed' AND worker = ?",
+                    (due_at, json.dumps(post), post_id, self.worker_id)
+                )
+            return cursor.rowcount == 1
+
+    def replay_in_flight(self) -> int:
+        """Requeue posts whose lease expired (e.g. left by a crashed run); returns how many"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE posts SET state = 'queued', claimed_at = NULL, lease_until = NULL, worker = NULL "
+                "WHERE state = 'claimed' AND (lease_until IS NULL OR lease_until <= ?)",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def scheduled_times(self) -> List[Dict]:
+        """Platform and due time of every queued post, without payloads"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT platform, due_at FROM posts WHERE state = 'queued'"
+            ).fetchall()
+        return [{'platform': platform, 'due_at': due_at} for platform, due_at in rows]
+
+    def dead_letter(self, post_id: int, post: Dict, error: str) -> bool:
+        """Move a leased post that can no longer be retried to the dead-letter table"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                cursor = self._conn.execute(
+                    "DELETE FROM posts WHERE id = ? AND state = 'claimed' AND worker = ?",
+                    (post_id, self.worker_id)
+                )
+                moved = cursor.rowcount == 1
+                if moved:
+                    self._conn.execute(
+                        'INSERT INTO dead_letters (platform, failed_at, attempts, error, payload) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (post['platform'], time.time(), post.get('retry_count', 0),
+                         error, json.dumps(post))
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            return moved
+
+    def dead_letters(self, platform: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Most recent dead-lettered posts, optionally for one platform"""
+        query = 'SELECT id, platform, failed_at, attempts, error, payload FROM dead_letters'
+        params = []
+        if platform:
+            query += ' WHERE platform = ?'
+            params.append(platform)
+        query += ' ORDER BY failed_at DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {'id': row[0], 'platform': row[1], 'failed_at': row[2],
+             'attempts': row[3], 'error': row[4], 'post': json.loads(row[5])}
+            for row in rows
+        ]
+
+    def redrive(self, dead_id: int, due_at: float) -> Optional[int]:
+        """Put a dead-lettered post back on the queue with a fresh retry budget"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT payload FROM dead_letters WHERE id = ?', (dead_id,)
+            ).fetchone()
+            self._conn.execute('DELETE FROM dead_letters WHERE id = ?', (dead_id,))
+        if row is None:
+            return None
+        post = json.loads(row[0])
+        post.pop('retry_count', None)
+        return self.push(post, due_at)
+
+    def dead_letter_count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM dead_letters').fetchone()[0]
+
+    def pending(self) -> List[Dict]:
+        """All queued and in-flight posts, in due order"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT payload FROM posts ORDER BY due_at'
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class RedisPostQueue:
+    """
+    Post queue adapter for the Redis service in docker-compose.yml.
+    Due posts live in one sorted set per platform scored by due time.
+    Claiming moves them into a claimed set scored by lease expiry and
+    records the owning worker, all inside Lua scripts so claims, acks and
+    lease expiry are atomic across every worker sharing the Redis.
+    Dead letters are kept in a hash + sorted set.
+    """
+
+    # KEYS: claimed, payload, owner, due keys...  ARGV: now, limit, lease_until, worker, due prefix
+    _CLAIM_SCRIPT = """
+        local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+        for _, id in ipairs(expired) do
+            local post = cjson.decode(redis.call('HGET', KEYS[2], id))
+            redis.call('ZREM', KEYS[1], id)
+            redis.call('HDEL', KEYS[3], id)
+            redis.call('ZADD', ARGV[5] .. post['platform'], ARGV[1], id)
+        end
+        local claimed = {}
+        for k = 4, #KEYS do
+            local due = redis.call('ZRANGEBYSCORE', KEYS[k], '-inf', ARGV[1],
+                                   'WITHSCORES', 'LIMIT', 0, ARGV[2])
+            for i = 1, #due, 2 do
+                local id = due[i]
+                redis.call('ZREM', KEYS[k], id)
+                redis.call('ZADD', KEYS[1], ARGV[3], id)
+                redis.call('HSET', KEYS[3], id, ARGV[4])
+                table.insert(claimed, id)
+                table.insert(claimed, redis.call('HGET', KEYS[2], id))
+                table.insert(claimed, due[i + 1])
+            end
+        end
+        return claimed
+    """
+
+    # Drop a lease held by ARGV[2]; the op scripts below continue only if it was still ours
+    # KEYS: claimed, owner  ARGV: id, worker
+    _RELEASE = """
+        if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+            return 0
+        end
+        redis.call('ZREM', KEYS[1], ARGV[1])
+        redis.call('HDEL', KEYS[2], ARGV[1])
+    """
+
+    # KEYS: claimed, owner, payload  ARGV: id, worker
+    _ACK_SCRIPT = _RELEASE + """
+        redis.call('HDEL', KEYS[3], ARGV[1])
+        return 1
+    """
+
+    # KEYS: claimed, owner, payload, due  ARGV: id, worker, due_at, payload
+    _REQUEUE_SCRIPT = _RELEASE + """
+        redis.call('HSET', KEYS[3], ARGV[1], ARGV[4])
+        redis.call('ZADD', KEYS[4], ARGV[3], ARGV[1])
+        return 1
+    """
+
+    # KEYS: claimed, owner, payload, dead, dead_index  ARGV: id, worker, record, failed_at
+    _DEAD_LETTER_SCRIPT = _RELEASE + """
+        redis.call('HDEL', KEYS[3], ARGV[1])
+        redis.call('HSET', KEYS[4], ARGV[1], ARGV[3])
+        redis.call('ZADD', KEYS[5], ARGV[4], ARGV[1])
+        return 1
+    """
+
+    # KEYS: claimed, owner  ARGV: lease_until, worker, ids...
+    _RENEW_SCRIPT = """
+        local renewed = 0
+        for i = 3, #ARGV do
+            if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[2] then
+                redis.call('ZADD', KEYS[1], ARGV[1], ARGV[i])
+                renewed = renewed + 1
+            end
+        end
+        return renewed
+    """
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', prefix: str = 'steelezone:posts',
+                 worker_id: Optional[str] = None, lease_seconds: float = 300.0):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("RedisPostQueue requires the redis package: pip install redis")
+        self.url = url
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._due_prefix = f'{prefix}:due:'
+        self._platforms_key = f'{prefix}:platforms'
+        self._claimed_key = f'{prefix}:claimed'
+        self._owner_key = f'{prefix}:owner'
+        self._payload_key = f'{prefix}:payload'
+        self._seq_key = f'{prefix}:seq'
+        self._dead_key = f'{prefix}:dead'
+        self._dead_index_key = f'{prefix}:dead_index'
+        self._claim = self._redis.register_script(self._CLAIM_SCRIPT)
+        self._ack = self._redis.register_script(self._ACK_SCRIPT)
+        self._requeue = self._redis.register_script(self._REQUEUE_SCRIPT)
+        self._dead_letter = self._redis.register_script(self._DEAD_LETTER_SCRIPT)
+        self._renew = self._redis.register_script(self._RENEW_SCRIPT)
+
+    def _due_keys(self) -> List[str]:
+        return [self._due_prefix + platform
+                for platform in sorted(self._redis.smembers(self._platforms_key))]
+
+    def push(self, post: Dict, due_at: float) -> int:
+        post_id = self._redis.incr(self._seq_key)
+        pipe = self._redis.pipeline()
+        pipe.hset(self._payload_key, post_id, json.dumps(post))
+        pipe.sadd(self._platforms_key, post['platform'])
+        pipe.zadd(self._due_prefix + post['platform'], {post_id: due_at})
+        pipe.execute()
+        return post_id
+
+    def push_many(self, entries: List[Tuple[Dict, float]]):
+        if not entries:
+            return
+        last_id = self._redis.incrby(self._seq_key, len(entries))
+        pipe = self._redis.pipeline(transaction=False)
+        for post_id, (post, due_at) in enumerate(entries, last_id - len(entries) + 1):
+            pipe.hset(self._payload_key, post_id, json.dumps(post))
+            pipe.sadd(self._platforms_key, post['platform'])
+            pipe.zadd(self._due_prefix + post['platform'], {post_id: due_at})
+        pipe.execute()
+
+    def next_due_at(self) -> Optional[float]:
+        pipe = self._redis.pipeline()
+        for key in self._due_keys() + [self._claimed_key]:
+            pipe.zrange(key, 0, 0, withscores=True)
+        heads = [head[0][1] for head in pipe.execute() if head]
+        return min(heads) if heads else None
+
+    def claim_due(self, now: float, limit: int = 100) -> List[Tuple[int, Dict, float]]:
+        """Atomically lease posts due by `now`; `limit` applies per platform"""
+        flat = self._claim(
+            keys=[self._claimed_key, self._payload_key, self._owner_key] + self._due_keys(),
+            args=[now, limit, now + self.lease_seconds, self.worker_id, self._due_prefix]
+        )
+        claimed = [
+            (int(flat[i]), json.loads(flat[i + 1]), float(flat[i + 2]))
+            for i in range(0, len(flat), 3)
+        ]
+        claimed.sort(key=lambda entry: entry[2])
+        return claimed
+
+    def renew(self, post_ids: List[int]) -> int:
+        if not post_ids:
+            return 0
+        return int(self._renew(
+            keys=[self._claimed_key, self._owner_key],
+            args=[time.time() + self.lease_seconds, self.worker_id, *post_ids]
+        ))
+
+    def ack(self, post_id: int) -> bool:
+        return bool(self._ack(
+            keys=[self._claimed_key, self._owner_key, self._payload_key],
+            args=[post_id, self.worker_id]
+        ))
+
+    def requeue(self, post_id: int, due_at: float, post: Optional[Dict] = None) -> bool:
+        if post is None:
+            payload = self._redis.hget(self._payload_key, post_id)
+            if payload is None:
+                return False
+            post = json.loads(payload)
+        return bool(self._requeue(
+            keys=[self._claimed_key, self._owner_key, self._payload_key,
+                  self._due_prefix + post['platform']],
+            args=[post_id, self.worker_id, due_at, json.dumps(post)]
+        ))
+
+    def replay_in_flight(self) -> int:
+        """Expired leases are released by the next claim; report how many are waiting"""
+        return self._redis.zcount(self._claimed_key, '-inf', time.time())
+
+    def scheduled_times(self) -> List[Dict]:
+        scheduled = []
+        for key in self._due_keys():
+            platform = key[len(self._due_prefix):]
+            scheduled.extend(
+                {'platform': platform, 'due_at': due_at}
+                for _, due_at in self._redis.zrange(key, 0, -1, withscores=True)
+            )
+        return scheduled
+
+    def dead_letter(self, post_id: int, post: Dict, error: str) -> bool:
+        failed_at = time.time()
+        record = {'id': post_id, 'platform': post['platform'], 'failed_at': failed_at,
+                  'attempts': post.get('retry_count', 0), 'error': error, 'post': post}
+        return bool(self._dead_letter(
+            keys=[self._claimed_key, self._owner_key, self._payload_key,
+                  self._dead_key, self._dead_index_key],
+            args=[post_id, self.worker_id, json.dumps(record), failed_at]
+        ))
+
+    def dead_letters(self, platform: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        ids = self._redis.zrevrange(self._dead_index_key, 0, -1)
+        records = []
+        for payload in self._redis.hmget(self._dead_key, ids) if ids else []:
+            record = json.loads(payload)
+            if platform is None or record['platform'] == platform:
+                records.append(record)
+                if len(records) == limit:
+                    break
+        return records
+
+    def redrive(self, dead_id: int, due_at: float) -> Optional[int]:
+        payload = self._redis.hget(self._dead_key, dead_id)
+        if payload is None:
+            return None
+        pipe = self._redis.pipeline()
+        pipe.hdel(self._dead_key, dead_id)
+        pipe.zrem(self._dead_index_key, dead_id)
+        pipe.execute()
+        post = json.loads(payload)['post']
+        post.pop('retry_count', None)
+        return self.push(post, due_at)
+
+    def dead_letter_count(self) -> int:
+        return self._redis.zcard(self._dead_index_key)
+
+    def pending(self) -> List[Dict]:
+        ids = self._redis.zrange(self._claimed_key, 0, -1)
+        for key in self._due_keys():
+            ids += self._redis.zrange(key, 0, -1)
+        if not ids:
+            return []
+        return [json.loads(payload) for payload in self._redis.hmget(self._payload_key, ids) if payload]
+
+    def __len__(self) -> int:
+        return self._redis.hlen(self._payload_key)
+
+    def close(self):
+        self._redis.close()
+
+def open_post_queue(location: Optional[str] = None, worker_id: Optional[str] = None):
+    """
+    Open the configured queue backend.
+    `location` (or CONTENT_QUEUE) is a redis:// URL or a SQLite file path.
+    Every scheduler worker sharing a location gets its own worker_id.
+    """
+    location = location or os.getenv('CONTENT_QUEUE', 'content_queue.db')
+    if location.startswith(('redis://', 'rediss://')):
+        return RedisPostQueue(location, worker_id=worker_id)
+    return SQLitePostQueue(location, worker_id=worker_id)
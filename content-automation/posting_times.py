@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Posting Times - Engagement-Driven Slot Learning
+Learns the best hours of the week to post from engagement history
+"""
+
+from datetime import datetime
+from typing import List, Dict, Sequence
+
+HOURS_PER_WEEK = 7 * 24
+
+def hour_of_week(moment: datetime) -> int:
+    """Monday 00:00 is slot 0, Sunday 23:00 is slot 167"""
+    return moment.weekday() * 24 + moment.hour
+
+class PostingTimeModel:
+    """
+    Per-platform, per-hour-of-week engagement histogram.
+    Fed incrementally from AIEngagementTracker.historical_data: each
+    refresh only reads records appended since the last one. The ranked
+    slots are cached, so reading them while scheduling a post is O(1).
+    """
+
+    def __init__(self, default_times: Dict[str, List[str]],
+                 slots_per_week: int = 28, prior_weight: float = 3.0):
+        """
+        Args:
+            default_times: Daily 'HH:MM' slots per platform used before data arrives
+            slots_per_week: How many top-scoring hours to keep per platform
+            prior_weight: Pseudo-observations given to the default schedule
+        """
+        self.slots_per_week = slots_per_week
+        self.prior_weight = prior_weight
+        self.default_times = default_times
+        self._reset()
+
+    def _reset(self):
+        default_times = self.default_times
+        self._default_slots = {
+            platform: {
+                day * 24 + int(time_of_day.split(':')[0])
+                for day in range(7) for time_of_day in times
+            }
+            for platform, times in default_times.items()
+        }
+        self._sums = {platform: [0.0] * HOURS_PER_WEEK for platform in default_times}
+        self._counts = {platform: [0] * HOURS_PER_WEEK for platform in default_times}
+        self._totals = {platform: [0.0, 0] for platform in default_times}
+        self._cursor = 0
+        self._slots = {}
+        for platform in default_times:
+            self._rank(platform)
+
+    def observe(self, record: Dict) -> bool:
+        """Add one tracked post to the histogram; False if it can't be used"""
+        platform = record.get('platform')
+        if platform not in self._sums or 'timestamp' not in record:
+            return False
+        timestamp = record['timestamp']
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        elif not isinstance(timestamp, datetime):
+            timestamp = datetime.fromtimestamp(timestamp)
+        slot = hour_of_week(timestamp)
+        score = record.get('engagement_score', 0.0)
+        self._sums[platform][slot] += score
+        self._counts[platform][slot] += 1
+        self._totals[platform][0] += score
+        self._totals[platform][1] += 1
+        return True
+
+    def refresh(self, history: Sequence[Dict]) -> int:
+        """
+        Consume records appended to `history` since the last refresh and
+        re-rank the platforms they touched. Returns the number consumed.
+        """
+        end = len(history)
+        if end < self._cursor:
+            # History was replaced/truncated; start over
+            self._reset()
+        touched = set()
+        for index in range(self._cursor, end):
+            record = history[index]
+            if self.observe(record):
+                touched.add(record['platform'])
+        consumed = end - self._cursor
+        self._cursor = end
+        for platform in touched:
+            self._rank(platform)
+        return consumed
+
+    def _rank(self, platform: str):
+        """Cache the top slots for a platform in chronological order"""
+        sums = self._sums[platform]
+        counts = self._counts[platform]
+        total, observed = self._totals[platform]
+        mean = total / observed if observed else 1.0
+        defaults = self._default_slots.get(platform, set())
+        scores = []
+        for slot in range(HOURS_PER_WEEK):
+            # Shrink sparse hours toward the default schedule
+            prior = mean if slot in defaults else mean / 2
+            score = (sums[slot] + self.prior_weight * prior) / (counts[slot] + self.prior_weight)
+            scores.append((score, slot in defaults, -slot))
+        scores.sort(reverse=True)
+        self._slots[platform] = sorted(-entry[2] for entry in scores[:self.slots_per_week])
+
+    def slots(self, platform: str) -> List[int]:
+        """Best hours of the week for a platform, in chronological order"""
+        return self._slots[platform]
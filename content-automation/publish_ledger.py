@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Publish Ledger - Idempotent Publishing
+Remembers which posts were already published so retries never double-post
+"""
+
+import os
+import json
+import math
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Optional, Union
+
+def idempotency_key(post: Dict, media_sha256: Optional[str]) -> str:
+    """
+    Stable key for one post: the same text and media on the same
+    platform/account and slot always map to the same key.
+    """
+    slot = post.get('optimized', {}).get('due_at', '')
+    parts = [post['platform'], post.get('account') or '', slot,
+             media_sha256 or post['media_path'], post['text']]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over hex SHA-256 keys.
+    Bit positions come from the key itself (double hashing), so a lookup
+    is k bit tests with no further hashing.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01, bits: Optional[bytes] = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits else bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> range:
+        h1 = int(key[:16], 16)
+        h2 = int(key[16:32], 16) | 1
+        return range(h1, h1 + self.hashes * h2, h2)
+
+    def add(self, key: str):
+        bits, size = self.bits, self.size
+        for position in self._positions(key):
+            position %= size
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        bits, size = self.bits, self.size
+        for position in self._positions(key):
+            position %= size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+class PublishLedger:
+    """
+    Persistent record of published idempotency keys.
+    An exact SQLite table is the source of truth; a Bloom filter in front
+    of it answers almost every "not published yet" check from memory, so
+    the publish path only touches the database on a (rare) filter hit.
+    The filter is saved with the ledger and grows (doubling) when the
+    history outgrows it, keeping the false-positive rate bounded at 1-3
+    bytes of memory per published post. Several workers on one host can
+    share one ledger file; sync() folds in keys recorded by the others.
+    Workers on different hosts need RedisPublishLedger instead.
+    """
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 1_000_000,
+                 error_rate: float = 0.01):
+        """
+        Args:
+            path: SQLite file (defaults to PUBLISH_LEDGER or publish_ledger.db)
+            capacity: Keys the filter is sized for before it is rebuilt larger
+            error_rate: Target Bloom filter false-positive rate
+        """
+        self.path = path or os.getenv('PUBLISH_LEDGER', 'publish_ledger.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS published (
+                key TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                published_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS bloom (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                capacity INTEGER NOT NULL,
+                error_rate REAL NOT NULL,
+                cursor INTEGER NOT NULL,
+                bits BLOB NOT NULL
+            )
+        """)
+        saved = self._conn.execute(
+            'SELECT capacity, error_rate, cursor, bits FROM bloom WHERE id = 1'
+        ).fetchone()
+        if saved and saved[1] == error_rate:
+            self._filter = BloomFilter(saved[0], saved[1], saved[3])
+            self._cursor = saved[2]
+        else:
+            history = self._conn.execute('SELECT MAX(rowid) FROM published').fetchone()[0] or 0
+            self._filter = BloomFilter(max(capacity, history * 2), error_rate)
+            self._cursor = 0
+        self.sync()
+
+    def sync(self) -> int:
+        """Add keys recorded since the last sync (by any worker) to the filter"""
+        with self._lock:
+            added = self._fold()
+            # Keys are never deleted, so the last rowid is the history size
+            if self._cursor > self._filter.capacity:
+                self._filter = BloomFilter(self._cursor * 2, self._filter.error_rate)
+                self._cursor = 0
+                self._fold()
+            return added
+
+    def _fold(self) -> int:
+        rows = self._conn.execute(
+            'SELECT rowid, key FROM published WHERE rowid > ? ORDER BY rowid',
+            (self._cursor,)
+        )
+        added = 0
+        for rowid, key in rows:
+            self._filter.add(key)
+            self._cursor = rowid
+            added += 1
+        return added
+
+    def seen(self, key: str) -> bool:
+        """True if a post with this key was already published"""
+        with self._lock:
+            if key not in self._filter:
+                return False
+            return self._conn.execute(
+                'SELECT 1 FROM published WHERE key = ?', (key,)
+            ).fetchone() is not None
+
+    def record(self, key: str, platform: str):
+        """Remember a successful publish"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO published (key, platform, published_at) VALUES (?, ?, ?)',
+                (key, platform, time.time())
+            )
+            self._filter.add(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM published').fetchone()[0]
+
+    def save(self):
+        """Persist the filter so the next start skips the rebuild"""
+        self.sync()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO bloom (id, capacity, error_rate, cursor, bits) '
+                'VALUES (1, ?, ?, ?, ?)',
+                (self._filter.capacity, self._filter.error_rate, self._cursor,
+                 bytes(self._filter.bits))
+            )
+
+    def close(self):
+        self.save()
+        with self._lock:
+            self._conn.close()
+
+class RedisPublishLedger:
+    """
+    Publish ledger kept in Redis, for workers spread over several hosts
+    (the Redis queue backend), which a local SQLite file cannot serve.
+    Published keys live in one hash shared by every worker, so a post
+    published on any host is seen on all of them at once; a lookup is
+    one HEXISTS round trip, small next to the publish request it guards.
+    Same interface as PublishLedger.
+    """
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', prefix: str = 'steelezone:ledger'):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("RedisPublishLedger requires the redis package: pip install redis")
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._published_key = f'{prefix}:published'
+
+    def sync(self) -> int:
+        """Nothing to fold in: every lookup reads the shared hash"""
+        return 0
+
+    def seen(self, key: str) -> bool:
+        """True if a post with this key was already published"""
+        return bool(self._redis.hexists(self._published_key, key))
+
+    def record(self, key: str, platform: str):
+        """Remember a successful publish"""
+        self._redis.hsetnx(self._published_key, key,
+                           json.dumps({'platform': platform, 'published_at': time.time()}))
+
+    def __len__(self) -> int:
+        return self._redis.hlen(self._published_key)
+
+    def save(self):
+        """Nothing to persist: Redis holds the whole ledger"""
+
+    def close(self):
+        self._redis.close()
+
+def open_publish_ledger(location: Optional[str] = None,
+                        queue_location: Optional[str] = None) -> Union[PublishLedger, RedisPublishLedger]:
+    """
+    Open the configured ledger backend.
+    `location` (or PUBLISH_LEDGER) is a redis:// URL or a SQLite file path.
+    Unset, the ledger follows the queue: it lives in the queue's Redis
+    when `queue_location` is a redis:// URL, so workers on every host
+    share it, and in publish_ledger.db otherwise.
+    """
+    location = location or os.getenv('PUBLISH_LEDGER')
+    if not location and queue_location and queue_location.startswith(('redis://', 'rediss://')):
+        location = queue_location
+    location = location or 'publish_ledger.db'
+    if location.startswith(('redis://', 'rediss://')):
+        return RedisPublishLedger(location)
+    return PublishLedger(location)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Async Publisher - Concurrent Platform Publishing
+Publishes due posts to every platform in parallel over pooled HTTP connections
+"""
+
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Optional, Tuple, Callable
+
+import httpx
+
+from rate_limiter import RateLimiter
+
+class AsyncPublisher:
+    """
+    Asyncio publishing engine used by the content scheduler.
+    Keeps one keep-alive client per platform, caps in-flight requests per
+    platform and publishes a burst of due posts concurrently, so a burst
+    takes as long as the slowest platform rather than the sum of them all.
+    Requests are paced by per-platform and per-account token buckets.
+    Each post is its own API call, and its outcome is reported as soon as
+    that call finishes rather than when the whole burst does.
+    """
+
+    def __init__(self, endpoints: Optional[Dict[str, str]] = None,
+                 max_concurrency: Optional[Dict[str, int]] = None,
+                 rate_limits: Optional[Dict[str, Dict]] = None,
+                 timeout: float = 30.0, metrics=None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            endpoints: Base URL per platform (defaults to <PLATFORM>_API_URL env vars).
+                Platforms without an endpoint run in dry-run mode.
+            max_concurrency: In-flight request cap per platform
+            rate_limits: Per-platform overrides of the rate_limits table
+            timeout: Per-request timeout in seconds
+            metrics: SchedulerMetrics receiving per-platform call latency and
+                the dispatch lag of posts carrying their 'queue_due_at'
+            transport: httpx transport for every platform client (e.g. an
+                httpx.MockTransport in tests; default is the network)
+        """
+        self.platforms = ['instagram', 'twitter', 'tiktok', 'onlyfans']
+        self.endpoints = endpoints if endpoints is not None else self._load_endpoints()
+        self.max_concurrency = {
+            'instagram': 4,
+            'twitter': 8,
+            'tiktok': 4,
+            'onlyfans': 4
+        }
+        if max_concurrency:
+            self.max_concurrency.update(max_concurrency)
+        # Request budgets per platform and per account
+        self.rate_limits = {
+            'instagram': {'requests': 200, 'per': 3600, 'burst': 10,
+                          'account_requests': 50, 'account_per': 86400},
+            'twitter': {'requests': 300, 'per': 900, 'burst': 20,
+                        'account_requests': 100, 'account_per': 86400},
+            'tiktok': {'requests': 6, 'per': 60, 'burst': 6,
+                       'account_requests': 15, 'account_per': 86400},
+            'onlyfans': {'requests': 60, 'per': 60, 'burst': 10,
+                         'account_requests': 200, 'account_per': 86400}
+        }
+        if rate_limits:
+            for platform, overrides in rate_limits.items():
+                self.rate_limits.setdefault(platform, {}).update(overrides)
+        self.rate_limiter = RateLimiter(self.rate_limits)
+        self.timeout = timeout
+        self.metrics = metrics
+        self.transport = transport
+        self._clients = {}
+        self._semaphores = {}
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _load_endpoints(self) -> Dict[str, str]:
+        """Read platform API base URLs from the environment"""
+        endpoints = {}
+        for platform in self.platforms:
+            url = os.getenv(f'{platform.upper()}_API_URL')
+            if url:
+                endpoints[platform] = url
+        return endpoints
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop thread on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name='publisher-loop', daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def submit(self, posts: List[Dict],
+               on_result: Optional[Callable[[Dict, Optional[Exception]], None]] = None) -> Future:
+        """
+        Hand a burst of due posts to the event loop without blocking.
+        The returned future resolves to [(post, error_or_None), ...] in input order;
+        `on_result(post, error)` runs on the loop thread as each post finishes.
+        """
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self.publish_many(posts, on_result), loop)
+
+    async def publish_many(self, posts: List[Dict],
+                           on_result: Optional[Callable[[Dict, Optional[Exception]], None]] = None
+                           ) -> List[Tuple[Dict, Optional[Exception]]]:
+        """
+        Publish all posts concurrently, bounded and paced per platform.
+        A post waiting on a rate limit doesn't hold back the others'
+        on_result calls.
+        """
+        async def publish(post: Dict) -> Tuple[Dict, Optional[Exception]]:
+            error = await self._publish(post)
+            if on_result is not None:
+                on_result(post, error)
+            return post, error
+        return list(await asyncio.gather(*(publish(post) for post in posts)))
+
+    async def _publish(self, post: Dict) -> Optional[Exception]:
+        """Publish one post, returning the error instead of raising"""
+        platform = post['platform']
+        try:
+            handler = getattr(self, f'_post_to_{platform}', None)
+            if handler is None:
+                raise ValueError(f"Unsupported platform: {platform}")
+            await self.rate_limiter.acquire(platform, post.get('account'))
+            async with self._semaphore(platform):
+                if self.metrics is not None and 'queue_due_at' in post:
+                    # After any rate-limit wait, so throttled posts show up as lag
+                    self.metrics.dispatch_lag.observe(time.time() - post['queue_due_at'])
+                started = time.perf_counter()
+                try:
+                    await handler(self._client(platform), post)
+                finally:
+                    if self.metrics is not None:
+                        self.metrics.publish_latency.observe(time.perf_counter() - started, platform)
+            return None
+        except Exception as e:
+            return e
+
+    def _semaphore(self, platform: str) -> asyncio.Semaphore:
+        """Per-platform concurrency cap (created on the loop thread)"""
+        if platform not in self._semaphores:
+            self._semaphores[platform] = asyncio.Semaphore(
+                self.max_concurrency.get(platform, 4)
+            )
+        return self._semaphores[platform]
+
+    def _client(self, platform: str) -> Optional[httpx.AsyncClient]:
+        """Pooled keep-alive client for a platform, None in dry-run mode"""
+        base_url = self.endpoints.get(platform)
+        if not base_url:
+            return None
+        if platform not in self._clients:
+            limit = self.max_concurrency.get(platform, 4)
+            headers = {}
+            token = os.getenv(f'{platform.upper()}_ACCESS_TOKEN')
+            if token:
+                headers['Authorization'] = f'Bearer {token}'
+            self._clients[platform] = httpx.AsyncClient(
+                base_url=base_url,
+                headers=headers,
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=limit,
+                    max_keepalive_connections=limit
+                )
+            )
+        return self._clients[platform]
+
+    async def _send(self, client: Optional[httpx.AsyncClient], path: str,
+                    payload: Dict, label: str, post: Dict):
+        """
+        POST a payload, or log it when the platform has no endpoint configured.
+        Sends the post's idempotency key so the platform can drop a retry of
+        a request that succeeded but timed out on our side.
+        """
+        if client is None:
+            print(f"  → {label} post created")
+            return
+        headers = {}
+        if post.get('idempotency_key'):
+            headers['Idempotency-Key'] = post['idempotency_key']
+        response = await client.post(path, json=payload, headers=headers)
+        response.raise_for_status()
+
+    async def _post_to_instagram(self, client: Optional[httpx.AsyncClient], post: Dict):
+        """Instagram Graph API integration (configure INSTAGRAM_API_URL)"""
+        await self._send(client, '/media', {
+            'caption': post['text'],
+            'media_path': post['media_path'],
+            'hashtags': post.get('optimized', {}).get('optimized_hashtags', [])
+        }, 'Instagram', post)
+
+    async def _post_to_twitter(self, client: Optional[httpx.AsyncClient], post: Dict):
+        """Twitter API v2 integration (configure TWITTER_API_URL)"""
+        await self._send(client, '/2/tweets', {
+            'text': post['text'],
+            'media_path': post['media_path']
+        }, 'Twitter', post)
+
+    async def _post_to_tiktok(self, client: Optional[httpx.AsyncClient], post: Dict):
+        """TikTok API integration (configure TIKTOK_API_URL)"""
+        await self._send(client, '/post/publish', {
+            'title': post['text'],
+            'media_path': post['media_path']
+        }, 'TikTok', post)
+
+    async def _post_to_onlyfans(self, client: Optional[httpx.AsyncClient], post: Dict):
+        """OnlyFans API integration (configure ONLYFANS_API_URL)"""
+        await self._send(client, '/posts', {
+            'text': post['text'],
+            'media_path': post['media_path']
+        }, 'OnlyFans', post)
+
+    async def _aclose_clients(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._semaphores.clear()
+
+    def close(self):
+        """Close pooled connections and stop the event loop thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._aclose_clients(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter - Platform Request Pacing
+Token buckets per platform and per account for the async publisher
+"""
+
+import time
+import asyncio
+from typing import Dict, Optional
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of rejections.
+    A caller takes its tokens immediately (the balance may go negative)
+    and is told how long to wait, so concurrent callers queue up at
+    exactly the refill rate instead of bursting and backing off.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens now and return the seconds to wait before using them"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= tokens
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+class RateLimiter:
+    """
+    Paces publish requests with one bucket per platform and one per
+    (platform, account). Limits are read from a table of the form
+    {platform: {'requests': n, 'per': seconds, 'burst': n,
+                'account_requests': n, 'account_per': seconds}}.
+    """
+
+    def __init__(self, limits: Dict[str, Dict]):
+        self.limits = limits
+        self._platform_buckets = {}
+        self._account_buckets = {}
+
+    def _bucket(self, buckets: Dict, key, requests: Optional[int],
+                per: float, burst: float) -> Optional[TokenBucket]:
+        if not requests:
+            return None
+        if key not in buckets:
+            buckets[key] = TokenBucket(requests / per, min(burst, requests))
+        return buckets[key]
+
+    def reserve(self, platform: str, account: Optional[str] = None) -> float:
+        """Reserve one request against the platform and account buckets"""
+        limit = self.limits.get(platform)
+        if not limit:
+            return 0.0
+        burst = limit.get('burst', 1)
+        wait = 0.0
+        platform_bucket = self._bucket(
+            self._platform_buckets, platform,
+            limit.get('requests'), limit.get('per', 1), burst
+        )
+        if platform_bucket:
+            wait = platform_bucket.reserve()
+        account_bucket = self._bucket(
+            self._account_buckets, (platform, account or 'default'),
+            limit.get('account_requests'), limit.get('account_per', 1), burst
+        )
+        if account_bucket:
+            wait = max(wait, account_bucket.reserve())
+        return wait
+
+    async def acquire(self, platform: str, account: Optional[str] = None):
+        """Wait until one request may be sent (call from the publisher loop)"""
+        wait = self.reserve(platform, account)
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Retry Policy - Publish Error Recovery
+Classifies publish errors and computes jittered backoff for retries
+"""
+
+import random
+from typing import Optional
+
+import httpx
+
+class FatalPublishError(Exception):
+    """Raised for publish failures that must never be retried"""
+
+# HTTP statuses that indicate a transient platform-side problem
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Classify a publish error.
+    Network failures, timeouts, throttling and 5xx responses are retryable;
+    other 4xx responses and malformed posts are fatal.
+    """
+    if isinstance(error, FatalPublishError):
+        return False
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUSES
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, (KeyError, ValueError, TypeError, FileNotFoundError)):
+        return False
+    return True
+
+class RetryPolicy:
+    """
+    Capped exponential backoff with jitter.
+    Each retry waits between half and all of min(max_delay, base_delay * 2^attempt),
+    so posts that failed together during an outage do not retry together.
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 60.0,
+                 max_delay: float = 900.0, rng: Optional[random.Random] = None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        """True if a post that has already been retried `attempt` times gets another try"""
+        return attempt < self.max_retries and is_retryable(error)
+
+    def next_delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """Seconds to wait before retry number attempt + 1"""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = ceiling / 2 + self._rng.uniform(0, ceiling / 2)
+        # Respect an explicit Retry-After from a throttling platform
+        if isinstance(error, httpx.HTTPStatusError):
+            retry_after = error.response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = max(delay, min(float(retry_after), self.max_delay))
+        return delay
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Scheduler Metrics - Prometheus Monitoring
+Dispatch lag, publish latency, queue depth, retries and dead letters
+"""
+
+import threading
+from bisect import bisect_left
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Callable, Sequence
+
+def _format(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+def _labels(name: str, value: str, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"'] if value else []
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    """Monotonic count, optionally split by one label"""
+
+    def __init__(self, name: str, help_text: str, label: str = ''):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()  # Held to add a label value and to snapshot
+
+    def inc(self, label_value: str = '', amount: float = 1):
+        values = self._values
+        if label_value not in values:
+            with self._lock:
+                values.setdefault(label_value, 0)
+        values[label_value] += amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_value, value in values:
+            lines.append(f'{self.name}{_labels(self.label, label_value)} {_format(value)}')
+        return lines
+
+class Gauge:
+    """Value read at scrape time, so it costs nothing between scrapes"""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} gauge',
+                f'{self.name} {_format(self.read())}']
+
+class Histogram:
+    """
+    Fixed-bucket histogram, optionally split by one label.
+    Each series is a flat list [bucket counts..., +Inf count, sum]; an
+    observation is one bisect and two list updates. Buckets are stored
+    non-cumulative and summed when rendered.
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], label: str = ''):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.bounds = sorted(buckets)
+        self._series = {}
+        self._lock = threading.Lock()  # Held to add a label value and to snapshot
+
+    def observe(self, value: float, label_value: str = ''):
+        series = self._series.get(label_value)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(label_value, [0] * (len(self.bounds) + 1) + [0.0])
+        series[bisect_left(self.bounds, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = sorted((label_value, list(series)) for label_value, series in self._series.items())
+        for label_value, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.bounds + [float('inf')], series):
+                cumulative += count
+                le = f'le="{_format(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.label, label_value, le)} {cumulative}')
+            labels = _labels(self.label, label_value)
+            lines.append(f'{self.name}_sum{labels} {_format(series[-1])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+class SchedulerMetrics:
+    """
+    Metrics surface for AIContentScheduler, rendered in Prometheus text format.
+    Recording takes no lock: every metric has a single writer (the
+    dispatcher thread, the publisher loop thread, or code holding the
+    scheduler's lock). Only the first use of a label value locks, against
+    a scrape copying the series at the same moment. Queue depth and the
+    dead-letter backlog are read from the queue when scraped.
+    """
+
+    def __init__(self):
+        self.dispatch_lag = Histogram(
+            'content_scheduler_dispatch_lag_seconds',
+            'Seconds between a post being due and its publish request starting',
+            [0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 3600]
+        )
+        self.publish_latency = Histogram(
+            'content_scheduler_publish_latency_seconds',
+            'Platform API call duration per publish request',
+            [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30], label='platform'
+        )
+        self.published = Counter(
+            'content_scheduler_published_total', 'Posts published', label='platform'
+        )
+        self.failures = Counter(
+            'content_scheduler_publish_failures_total', 'Failed publish attempts', label='platform'
+        )
+        self.retries = Counter(
+            'content_scheduler_retries_total', 'Posts requeued for another attempt', label='platform'
+        )
+        self.dead_letters = Counter(
+            'content_scheduler_dead_letters_total', 'Posts moved to the dead-letter queue',
+            label='platform'
+        )
+        self.gauges = []
+        self._server = None
+
+    def track_queue(self, queue, in_flight: Callable[[], int]):
+        """Expose queue depth, in-flight posts and the dead-letter backlog"""
+        self.gauges = [
+            Gauge('content_scheduler_queue_depth', 'Posts on the queue (queued and leased)',
+                  lambda: len(queue)),
+            Gauge('content_scheduler_in_flight', 'Posts handed to the publisher by this worker',
+                  in_flight),
+            Gauge('content_scheduler_dead_letter_backlog', 'Posts waiting in the dead-letter queue',
+                  queue.dead_letter_count),
+        ]
+
+    def render(self) -> str:
+        lines = []
+        for metric in [self.dispatch_lag, self.publish_latency, self.published,
+                       self.failures, self.retries, self.dead_letters] + self.gauges:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Serve /metrics from a background thread (once per process)"""
+        if self._server is not None:
+            return self._server
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name='scheduler-metrics',
+                         daemon=True).start()
+        print(f"📈 Metrics on http://{host}:{self._server.server_port}/metrics")
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Slot Allocator - Capacity-Aware Post Spreading
+Spreads queued posts over the learned posting slots and future days
+"""
+
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict
+
+class SlotAllocator:
+    """
+    Calendar index of posting slots per platform.
+    A slot is one learned hour-of-week on a concrete date; it holds up to
+    `capacity` posts spaced `min_gap` seconds apart. Slots with room left
+    are kept in a min-heap per platform and generated a week at a time
+    on demand; slots that fill up are skipped lazily when they reach the
+    top. Each allocation evicts the slots (and their post counts) at or
+    before its `after` time, so the next free slot is a heap pop and
+    memory stays bounded by the slots still ahead. When a platform's
+    learned hours change (the posting-time model was refit), its heap is
+    rebuilt from the new hours; post counts are kept, so slots already
+    holding posts stay capped.
+    """
+
+    def __init__(self, capacity: int = 2, min_gap: float = 15 * 60):
+        """
+        Args:
+            capacity: Posts allowed per slot and platform
+            min_gap: Seconds between posts sharing a slot
+        """
+        if capacity < 1 or capacity * min_gap > 3600:
+            raise ValueError("capacity * min_gap must fit inside a one-hour slot")
+        self.capacity = capacity
+        self.min_gap = min_gap
+        self._free = {}        # platform -> heap of slot starts that may have room
+        self._used = {}        # platform -> {slot start: posts in it}
+        self._used_order = {}  # platform -> heap of the slot starts in _used
+        self._next_week = {}
+        self._hours = {}       # platform -> learned hours its heap was built from
+
+    def _week_start(self, moment: datetime) -> datetime:
+        return (moment - timedelta(days=moment.weekday())).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+    def _slot_start(self, timestamp: float) -> float:
+        return datetime.fromtimestamp(timestamp).replace(
+            minute=0, second=0, microsecond=0
+        ).timestamp()
+
+    def _extend(self, platform: str, slots: List[int]):
+        """Add the next week's slots that still have room"""
+        free = self._free.setdefault(platform, [])
+        used = self._used.get(platform, {})
+        week = self._next_week.get(platform) or self._week_start(datetime.now())
+        for slot in slots:
+            start = (week + timedelta(hours=slot)).timestamp()
+            if used.get(start, 0) < self.capacity:
+                heapq.heappush(free, start)
+        self._next_week[platform] = week + timedelta(days=7)
+
+    def _count(self, platform: str, start: float) -> int:
+        """Count one more post in a slot; returns the posts it held before"""
+        used = self._used.setdefault(platform, {})
+        count = used.get(start, 0)
+        if not count:
+            heapq.heappush(self._used_order.setdefault(platform, []), start)
+        used[start] = count + 1
+        return count
+
+    def _evict(self, platform: str, cutoff: float):
+        """Forget the post counts of slots at or before `cutoff`"""
+        used = self._used.get(platform, {})
+        order = self._used_order.get(platform, [])
+        while order and order[0] <= cutoff:
+            del used[heapq.heappop(order)]
+
+    def reserve(self, platform: str, due_at: float):
+        """Record an already scheduled post (e.g. loaded from the queue on startup)"""
+        # A slot this fills stays in the free heap until allocate skips it
+        self._count(platform, self._slot_start(due_at))
+
+    def allocate(self, platform: str, slots: List[int], after: datetime) -> datetime:
+        """
+        Take the earliest slot after `after` that still has capacity.
+        Slots at or before `after` (or now) are dropped, so `after` is
+        expected not to go back between calls.
+
+        Args:
+            platform: Target platform
+            slots: Learned hours of the week for the platform (chronological)
+            after: Earliest acceptable posting time
+        Returns:
+            Posting time: slot start plus min_gap for each post already in it
+        """
+        if not slots:
+            raise ValueError(f"No posting slots for {platform}")
+        if self._hours.get(platform) != tuple(slots):
+            # New or refit hours: slots generated from the old ones must not be handed out
+            self._hours[platform] = tuple(slots)
+            self._free[platform] = []
+            self._next_week.pop(platform, None)
+        free = self._free[platform]
+        used = self._used.setdefault(platform, {})
+        cutoff = max(after.timestamp(), time.time())
+        self._evict(platform, cutoff)
+        while True:
+            # Drop slots that have passed or filled up
+            while free and (free[0] <= cutoff or used.get(free[0], 0) >= self.capacity):
+                heapq.heappop(free)
+            if free:
+                break
+            self._extend(platform, slots)
+        start = free[0]
+        count = self._count(platform, start)
+        if count + 1 >= self.capacity:
+            heapq.heappop(free)
+        return datetime.fromtimestamp(start + count * self.min_gap)
+
+    def load(self, scheduled: List[Dict]):
+        """Reserve capacity for posts already on the queue: [{'platform', 'due_at'}]"""
+        for entry in scheduled:
+            self.reserve(entry['platform'], entry['due_at'])
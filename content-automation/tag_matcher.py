@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tag Matcher - Multi-Pattern Hashtag Matching
+Finds the hashtags relevant to a caption in one pass, however many tags exist
+"""
+
+import re
+from typing import List, Dict, Set, Iterable, Optional
+
+# CamelCase words of a tag: '#OnlyFansCreator' -> Only, Fans, Creator; '#OFModel' -> OF, Model
+_SEGMENT = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+def tag_word(tag: str) -> str:
+    """'#ContentCreator' -> 'contentcreator'"""
+    return tag.lower().replace('#', '')
+
+def tag_segments(tag: str) -> Set[str]:
+    """Lowercased runs of consecutive CamelCase words, e.g. only, fans, onlyfans, fanscreator, ..."""
+    words = [word.lower() for word in _SEGMENT.findall(tag)]
+    return {
+        ''.join(words[start:end])
+        for start in range(len(words)) for end in range(start + 1, len(words) + 1)
+    }
+
+class TagMatcher:
+    """
+    Index of hashtags grouped by source (trending, niche categories, ...).
+    A keyword matches a tag when the tag's word occurs inside the keyword
+    ('creators' -> #Creator), found with an Aho-Corasick automaton, or
+    when the keyword is one of the tag's CamelCase words or runs of them
+    ('content' -> #ContentCreator), found with a hash lookup. Matching
+    costs O(keyword length + matches) whatever the number of tags.
+    Tags are added and removed incrementally. When a tag word's last tag
+    goes, the trie branch no other word uses is pruned and its nodes are
+    reused, so the trie tracks the live tags however much trending lists
+    churn. Changes only mark the links stale: they are rebuilt once,
+    before the next match, however many tags changed in between.
+    """
+
+    def __init__(self):
+        # Trie: goto edges, failure link, pattern ending at the node, next node
+        # on the failure chain that ends a pattern
+        self._goto = [{}]
+        self._fail = [0]
+        self._pattern = [None]
+        self._output = [0]
+        self._free = []          # Pruned nodes, reused by the next insert
+        self._links_stale = False
+        self._word_tags = {}     # tag word -> tags
+        self._segment_tags = {}  # CamelCase segment run -> tags
+        self._groups = {}        # tag -> {group: rank}
+        self._members = {}       # group -> tags
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self._groups
+
+    def groups(self, tag: str) -> Dict[str, int]:
+        """Groups a tag belongs to, with its rank (position) in each"""
+        return self._groups.get(tag, {})
+
+    def add(self, tag: str, group: str, rank: int = 0):
+        self._members.setdefault(group, set()).add(tag)
+        groups = self._groups.get(tag)
+        if groups is not None:
+            groups[group] = rank
+            return
+        self._groups[tag] = {group: rank}
+        word = tag_word(tag)
+        if word not in self._word_tags:
+            self._word_tags[word] = set()
+            self._insert(word)
+        self._word_tags[word].add(tag)
+        for segment in tag_segments(tag):
+            self._segment_tags.setdefault(segment, set()).add(tag)
+
+    def remove(self, tag: str, group: str):
+        groups = self._groups.get(tag)
+        if groups is None or group not in groups:
+            return
+        del groups[group]
+        self._members[group].discard(tag)
+        if groups:
+            return
+        del self._groups[tag]
+        word = tag_word(tag)
+        tags = self._word_tags[word]
+        tags.discard(tag)
+        if not tags:
+            del self._word_tags[word]
+            self._delete(word)
+        for segment in tag_segments(tag):
+            tags = self._segment_tags[segment]
+            tags.discard(tag)
+            if not tags:
+                del self._segment_tags[segment]
+
+    def sync(self, group: str, tags: Iterable[str]):
+        """Make `group` hold exactly `tags` (ranked in order), touching only what changed"""
+        ranks = {}
+        for rank, tag in enumerate(tags):
+            ranks.setdefault(tag, rank)
+        stale = [tag for tag in self._members.get(group, ()) if tag not in ranks]
+        for tag in stale:
+            self.remove(tag, group)
+        for tag, rank in ranks.items():
+            self.add(tag, group, rank)
+
+    def _insert(self, word: str):
+        node = 0
+        for char in word:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = self._goto[node][char] = self._new_node()
+                self._links_stale = True
+            node = child
+        if self._pattern[node] is None:
+            self._pattern[node] = word
+            self._links_stale = True
+
+    def _new_node(self) -> int:
+        if self._free:
+            node = self._free.pop()
+            self._goto[node] = {}
+            self._fail[node] = 0
+            self._pattern[node] = None
+            self._output[node] = 0
+            return node
+        self._goto.append({})
+        self._fail.append(0)
+        self._pattern.append(None)
+        self._output.append(0)
+        return len(self._goto) - 1
+
+    def _delete(self, word: str):
+        """Unmark a word and prune the nodes only it used"""
+        path = [0]
+        for char in word:
+            path.append(self._goto[path[-1]][char])
+        self._pattern[path[-1]] = None
+        self._links_stale = True
+        for depth in range(len(word), 0, -1):
+            node = path[depth]
+            if self._goto[node] or self._pattern[node] is not None:
+                break
+            del self._goto[path[depth - 1]][word[depth - 1]]
+            self._free.append(node)
+
+    def _link(self):
+        """Breadth-first failure and output links"""
+        goto, fail, pattern, output = self._goto, self._fail, self._pattern, self._output
+        queue = list(goto[0].values())
+        for child in queue:
+            fail[child] = 0
+            output[child] = 0
+        for node in queue:
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(char, 0)
+                fail[child] = target
+                output[child] = target if pattern[target] is not None else output[target]
+                queue.append(child)
+        self._links_stale = False
+
+    def match(self, keywords: Iterable[str], group: Optional[str] = None) -> List[str]:
+        """
+        Tags relevant to any of the keywords, in rank order.
+        With `group`, only tags of that group are returned.
+        """
+        if self._links_stale:
+            self._link()
+        goto, fail, pattern, output = self._goto, self._fail, self._pattern, self._output
+        word_tags, segment_tags = self._word_tags, self._segment_tags
+        found = set()
+        for keyword in keywords:
+            found.update(segment_tags.get(keyword, ()))
+            state = 0
+            for char in keyword:
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                hit = state if pattern[state] is not None else output[state]
+                while hit:
+                    found.update(word_tags[pattern[hit]])
+                    hit = output[hit]
+        if group is None:
+            return sorted(found, key=lambda tag: min(self._groups[tag].values()))
+        ranked = [(self._groups[tag][group], tag) for tag in found if group in self._groups[tag]]
+        return [tag for _, tag in sorted(ranked)]
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Tag Scorer - Vectorized Hashtag Scoring
+Scores candidate hashtags from a precomputed feature table with per-platform weights
+"""
+
+import heapq
+import numpy as np
+from typing import List, Dict, Tuple, Callable, Optional, Sequence
+
+from tag_matcher import tag_word
+
+FEATURES = ('base', 'trending', 'platform', 'brand', 'relevance', 'learned')
+
+_PLAIN_ROW, _BRAND_ROW = 0, 1
+
+# Tags remembered before the lookup memo starts over
+_MEMO_MAX = 65536
+
+# Below this many candidates numpy's per-call overhead outweighs the vector work
+_VECTOR_MIN = 64
+
+DEFAULT_WEIGHTS = {
+    'base': 0.5,       # Every tag
+    'trending': 0.3,   # On the trending list
+    'platform': 0.2,   # On the target platform's own tag list
+    'brand': 0.4,      # Brand tags (#TheSteeleZone)
+    'relevance': 0.3,  # Tag word appears in the caption
+    'learned': 0.3     # Engagement lift learned from tracked posts, in [-1, 1]
+}
+
+class TagScorer:
+    """
+    Feature table over the tag corpus, one row per tag.
+    Flags (trending, platform lists, brand) are computed once when a tag
+    is first scored; tags outside the corpus share two rows, so the table
+    stays bounded however many captions are tagged. The caption-independent
+    score of every row is kept per platform, so scoring a caption is one
+    gather plus the relevance flags, and the top N come from a partial
+    selection, not a full sort. Small candidate sets skip numpy and use
+    a list copy of the same scores. rank_batch() scores the candidates of
+    many captions in one pass.
+    Call clear() when the tag corpus changes.
+    """
+
+    def __init__(self, groups: Callable[[str], Dict[str, int]],
+                 weights: Optional[Dict[str, Dict[str, float]]] = None, model=None):
+        """
+        Args:
+            groups: Tag -> groups it belongs to ('trending', 'platform:<p>', ...),
+                empty for tags outside the corpus (e.g. TagMatcher.groups)
+            weights: Per-platform overrides of DEFAULT_WEIGHTS
+            model: HashtagModel whose learned lifts are added to the scores
+        """
+        self.groups = groups
+        self.model = model
+        self._default = self._vector(DEFAULT_WEIGHTS)
+        self.weights = {}  # platform -> weight vector in FEATURES order
+        self.clear()
+        for platform, platform_weights in (weights or {}).items():
+            self.set_weights(platform, platform_weights)
+
+    @staticmethod
+    def _vector(weights: Dict[str, float]) -> np.ndarray:
+        merged = {**DEFAULT_WEIGHTS, **weights}
+        return np.array([merged[feature] for feature in FEATURES])
+
+    def set_weights(self, platform: str, weights: Dict[str, float]):
+        """Override feature weights for one platform (unset features keep their default)"""
+        self.weights[platform] = self._vector(weights)
+        self._static.pop(platform, None)
+
+    def clear(self):
+        """Forget all rows (flags are recomputed on next use)"""
+        self._rows = {}       # tag -> row
+        self._platforms = []  # row -> platforms whose tag list holds the tag
+        self._trending = np.zeros(64, dtype=bool)
+        self._brand = np.zeros(64, dtype=bool)
+        self._static = {}     # platform -> caption-independent score per row (array, list)
+        self._memo = {}       # tag -> (row, tag word), including outside-corpus tags
+        # Shared rows for tags outside the corpus (e.g. generated from the
+        # caption), which only differ by the brand flag
+        self._append(frozenset(), False, False)
+        self._append(frozenset(), False, True)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _lookup(self, tags: List[str]) -> List[Tuple[int, str]]:
+        """(row, tag word) of every tag"""
+        memo = self._memo
+        entries = list(map(memo.get, tags))
+        if None in entries:
+            entries = [entry if entry is not None else self._entry(tag)
+                       for tag, entry in zip(tags, entries)]
+        return entries
+
+    def _entry(self, tag: str) -> Tuple[int, str]:
+        row = self._rows.get(tag)
+        if row is None:
+            brand = 'steelezone' in tag.lower()
+            groups = self.groups(tag)
+            if groups:
+                platforms = frozenset(group[9:] for group in groups if group.startswith('platform:'))
+                row = self._rows[tag] = self._append(platforms, 'trending' in groups, brand)
+            else:
+                row = _BRAND_ROW if brand else _PLAIN_ROW
+        if len(self._memo) >= _MEMO_MAX:
+            self._memo.clear()
+        entry = self._memo[tag] = (row, tag_word(tag))
+        return entry
+
+    def _append(self, platforms: frozenset, trending: bool, brand: bool) -> int:
+        row = len(self._platforms)
+        if row == len(self._trending):
+            self._grow(row * 2)
+        self._trending[row] = trending
+        self._brand[row] = brand
+        self._platforms.append(platforms)
+        for platform, (static, values) in self._static.items():
+            weights = self.weights.get(platform, self._default)
+            static[row] = (weights[0] + weights[1] * trending
+                           + weights[2] * (platform in platforms) + weights[3] * brand)
+            values.append(static.item(row))
+        return row
+
+    def _grow(self, capacity: int):
+        def grown(values):
+            array = np.zeros(capacity, dtype=values.dtype)
+            array[:len(values)] = values
+            return array
+        self._trending = grown(self._trending)
+        self._brand = grown(self._brand)
+        self._static = {platform: (grown(static), values)
+                        for platform, (static, values) in self._static.items()}
+
+    def static_scores(self, platform: str) -> np.ndarray:
+        """Caption-independent score of every row for one platform"""
+        return self._static_pair(platform)[0]
+
+    def _static_pair(self, platform: str) -> Tuple[np.ndarray, List[float]]:
+        # The list copy serves small candidate sets without numpy call overhead
+        pair = self._static.get(platform)
+        if pair is None:
+            count = len(self._platforms)
+            weights = self.weights.get(platform, self._default)
+            on_platform = np.fromiter((platform in platforms for platforms in self._platforms),
+                                      dtype=bool, count=count)
+            static = np.zeros(len(self._trending))
+            static[:count] = (weights[0] + weights[1] * self._trending[:count]
+                              + weights[2] * on_platform + weights[3] * self._brand[:count])
+            pair = self._static[platform] = (static, static[:count].tolist())
+        return pair
+
+    def rank(self, tags: List[str], platform: str, count: Optional[int] = None,
+             content: str = '') -> List[Tuple[str, float]]:
+        """
+        Top `count` tags (all when None) as (tag, score), best first, ties
+        broken by tag.
+
+        Args:
+            tags: Candidate tags (no duplicates)
+            platform: Target platform
+            count: Tags to return
+            content: Lowercased caption the relevance flag is checked against
+        """
+        if not tags:
+            return []
+        entries = self._lookup(tags)
+        weights = self.weights.get(platform, self._default)
+        static, values = self._static_pair(platform)
+        learned = self.model.lifts(tags, platform) if self.model is not None else None
+        if len(tags) < _VECTOR_MIN:
+            relevance = weights[4].item()
+            scored = [(tag, values[row] + relevance if word in content else values[row])
+                      for tag, (row, word) in zip(tags, entries)]
+            if learned is not None:
+                scored = [(tag, value + bonus)
+                          for (tag, value), bonus in zip(scored, (weights[5] * learned).tolist())]
+            scored.sort(key=lambda item: (-item[1], item[0]))
+            return scored[:count]
+
+        rows = [row for row, _ in entries]
+        relevant = np.array([word in content for _, word in entries])
+        scores = static[rows] + weights[4] * relevant
+        if learned is not None:
+            scores += weights[5] * learned
+        values = scores.tolist()
+        if count is None or count >= len(tags):
+            picked = sorted(range(len(tags)), key=lambda i: (-values[i], tags[i]))
+        else:
+            # Tags above the k-th best score are in; ties with it are settled by tag
+            kth = scores[np.argpartition(-scores, count - 1)[count - 1]]
+            picked = sorted(np.flatnonzero(scores > kth).tolist(), key=lambda i: (-values[i], tags[i]))
+            tied = np.flatnonzero(scores == kth).tolist()
+            picked += heapq.nsmallest(count - len(picked), tied, key=tags.__getitem__)
+        return [(tags[i], values[i]) for i in picked]
+
+    def rank_batch(self, requests: Sequence[Tuple[List[str], str, Optional[int], str]]
+                   ) -> List[List[Tuple[str, float]]]:
+        """
+        rank() for many candidate lists at once, one (tags, platform, count,
+        content) request each. The candidates of the whole batch are
+        scored in one gather over the per-platform static scores, and every
+        list's top `count` comes out of one sort keyed by (list, score, tag),
+        so the results match rank() request by request.
+        """
+        tags = [tag for candidates, _, _, _ in requests for tag in candidates]
+        if not tags:
+            return [[] for _ in requests]
+        entries = self._lookup(tags)
+        sizes = np.array([len(candidates) for candidates, _, _, _ in requests])
+        segment = np.repeat(np.arange(len(requests)), sizes)
+        platforms = list(dict.fromkeys(platform for _, platform, _, _ in requests))
+        codes = {platform: code for code, platform in enumerate(platforms)}
+        tag_platform = np.array([codes[platform] for _, platform, _, _ in requests])[segment]
+        # Rows were appended by the lookup, so every platform's scores cover them
+        static = np.stack([self._static_pair(platform)[0] for platform in platforms])
+        weights = np.stack([self.weights.get(platform, self._default) for platform in platforms])
+
+        rows = np.fromiter((row for row, _ in entries), dtype=np.int64, count=len(tags))
+        contents = [content for candidates, _, _, content in requests for _ in candidates]
+        relevant = np.fromiter((word in content for (_, word), content in zip(entries, contents)),
+                               dtype=bool, count=len(tags))
+        scores = static[tag_platform, rows] + weights[tag_platform, 4] * relevant
+        if self.model is not None:
+            for code, platform in enumerate(platforms):
+                positions = np.flatnonzero(tag_platform == code)
+                learned = self.model.lifts([tags[i] for i in positions.tolist()], platform)
+                if learned is not None:
+                    scores[positions] += weights[code, 5] * learned
+
+        # Within each list: best score first, ties by tag, then the top `count`.
+        # Sorted as one integer key (list, score rank, tag rank) where it fits
+        levels, score_rank = np.unique(-scores, return_inverse=True)
+        names = sorted(set(tags))
+        name_rank = dict(zip(names, range(len(names))))
+        tag_rank = np.fromiter(map(name_rank.__getitem__, tags), dtype=np.int64, count=len(tags))
+        if len(requests) * len(levels) * len(names) < 2 ** 63:
+            order = np.argsort((segment * len(levels) + score_rank) * len(names) + tag_rank)
+        else:
+            order = np.lexsort((tag_rank, score_rank, segment))
+        limits = np.array([size if count is None else count
+                           for size, (_, _, count, _) in zip(sizes.tolist(), requests)])
+        starts = np.cumsum(sizes) - sizes
+        ranked_segment = segment[order]
+        picked = order[np.arange(len(order)) - starts[ranked_segment] < limits[ranked_segment]]
+        values = scores.tolist()
+        results = [[] for _ in requests]
+        for i, owner in zip(picked.tolist(), segment[picked].tolist()):
+            results[owner].append((tags[i], values[i]))
+        return results
+
+    def score(self, tag: str, platform: str, content: str = '') -> float:
+        """Score of a single tag against a lowercased caption"""
+        return self.rank([tag], platform, content=content)[0][1]
+
+    def set_score(self, tags: List[str], platform: str) -> float:
+        """
+        Mean caption-independent score of a hashtag set, including the
+        learned lift of its tags and of the pairs they form
+        """
+        if not tags:
+            return 0.0
+        values = self._static_pair(platform)[1]
+        score = sum(values[row] for row, _ in self._lookup(tags)) / len(tags)
+        learned = self.model.lifts(tags, platform) if self.model is not None else None
+        if learned is not None:
+            weight = self.weights.get(platform, self._default).item(5)
+            score += weight * (learned.mean().item() + self.model.pair_lift(tags, platform))
+        return score
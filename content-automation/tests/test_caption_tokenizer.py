@@ -0,0 +1,23 @@
+import random
+
+from caption_tokenizer import STOP_WORDS, keywords, tokens
+
+WORDS = ["don't", 'TheSteeleZone', 'https://t.co/x1', 'www.site.com/a', 'café', 'naïve', '🔥',
+         '👍🏽', '🇺🇸', 'Über', 'the', 'THIS', 'rock’n’roll', 'x', 'emoji🔥fire', 'über-cool',
+         '\n', '日本語テキスト']
+
+def test_keywords_match_tokens_for_captions_and_transcripts():
+    rng = random.Random(1)
+    for n in range(500):
+        # Every tenth text is long enough to be matched in several pieces
+        length = rng.randrange(1, 600 if n % 10 == 0 else 20)
+        text = ' '.join(rng.choice(WORDS) for _ in range(length))
+        expected = [word for word in tokens(text, emoji=False)
+                    if len(word) > 3 and word.lower() not in STOP_WORDS]
+        for limit in (3, 10, len(expected) + 1):
+            assert keywords(text, limit, lower=False) == expected[:limit]
+            assert keywords(text, limit) == [word.lower() for word in expected[:limit]]
+
+def test_brand_words_keep_their_case_and_urls_are_skipped():
+    caption = "Behind the scenes at #TheSteeleZone ✨ don't miss it https://t.co/x1 💎"
+    assert keywords(caption, lower=False) == ['Behind', 'scenes', 'TheSteeleZone', 'dont', 'miss']
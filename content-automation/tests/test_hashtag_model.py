@@ -0,0 +1,38 @@
+import numpy as np
+
+from hashtag_model import HashtagModel
+
+def history(posts: int):
+    tags = [['#a', '#b'], ['#b', '#c', '#d'], ['#a']]
+    return [{'platform': 'instagram', 'hashtags': tags[i % 3], 'engagement_score': 10.0 + i}
+            for i in range(posts)]
+
+def counts(model: HashtagModel):
+    return (model.tags.counts.copy(), model.pairs.counts.copy(),
+            {platform: list(baseline) for platform, baseline in model._baselines.items()})
+
+def test_reload_does_not_relearn_history(tmp_path):
+    path = str(tmp_path / 'model.npz')
+    posts = history(30)
+    model = HashtagModel(path, width=256)
+    assert model.refresh(posts) == 30
+    model.save()
+    learned = counts(model)
+
+    reloaded = HashtagModel(path)
+    assert reloaded.refresh(posts) == 0
+    tags, pairs, baselines = counts(reloaded)
+    assert np.array_equal(tags, learned[0])
+    assert np.array_equal(pairs, learned[1])
+    assert baselines == learned[2]
+
+    # Posts tracked after the restart are still learned, once
+    posts += history(3)
+    assert reloaded.refresh(posts) == 3
+    assert reloaded._baselines['instagram'][1] == 33
+
+def test_refresh_saves_changes(tmp_path):
+    path = str(tmp_path / 'model.npz')
+    model = HashtagModel(path, width=256, save_interval=0.0)
+    model.refresh(history(5))
+    assert HashtagModel(path)._baselines['instagram'][1] == 5
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from media_preflight import MediaPreflight
+
+JPEG = b'\xff\xd8\xff\xe0' + b'\x00' * 1024
+
+@pytest.fixture
+def preflight():
+    preflight = MediaPreflight(max_workers=2)
+    yield preflight
+    preflight.close()
+
+def test_file_changing_during_inspection_is_not_left_in_progress(preflight, tmp_path):
+    media = tmp_path / 'photo.jpg'
+    media.write_bytes(JPEG)
+    inspect = preflight._inspect
+
+    def edited_mid_read(path):
+        report = inspect(path)
+        media.write_bytes(JPEG + b'edited')
+        return report
+    preflight._inspect = edited_mid_read
+    preflight.submit(str(media)).result()
+    assert preflight._in_progress == {}
+    assert str(media) not in preflight._cache
+
+    preflight._inspect = inspect
+    assert preflight.check(str(media))['size'] == os.path.getsize(media)
+
+def test_failed_inspection_is_not_left_in_progress(preflight, tmp_path):
+    media = tmp_path / 'photo.jpg'
+    media.write_bytes(JPEG)
+
+    def broken(path):
+        raise RuntimeError('disk gone')
+    preflight._inspect = broken
+    with pytest.raises(RuntimeError):
+        preflight.submit(str(media)).result()
+    assert preflight._in_progress == {}
+
+def test_released_posts_stop_counting_as_duplicates(preflight, tmp_path):
+    first, second = tmp_path / 'a.jpg', tmp_path / 'b.jpg'
+    first.write_bytes(JPEG)
+    second.write_bytes(JPEG)
+    reports = [preflight.register(str(path)).result() for path in (first, second, first)]
+    preflight.close()  # Done callbacks have run once the pool is drained
+    assert preflight.duplicates() == [{'sha256': reports[0]['sha256'],
+                                       'paths': [str(first), str(second)], 'uses': 3}]
+
+    preflight.release(reports[1])
+    assert preflight.duplicates()[0]['paths'] == [str(first)]
+    preflight.release(reports[0])
+    assert preflight.duplicates() == []
+    preflight.release(reports[2])
+    preflight.release(reports[2])  # Already released (or counted elsewhere): ignored
+    assert preflight._uses == {}
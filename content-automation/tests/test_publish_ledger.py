@@ -0,0 +1,30 @@
+import pytest
+
+from publish_ledger import PublishLedger, RedisPublishLedger, open_publish_ledger
+
+redis = pytest.importorskip('redis')
+fakeredis = pytest.importorskip('fakeredis')
+
+@pytest.fixture
+def shared_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url', classmethod(
+        lambda cls, url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs)))
+    monkeypatch.delenv('PUBLISH_LEDGER', raising=False)
+
+def test_hosts_sharing_a_redis_queue_share_the_ledger(shared_redis):
+    first = open_publish_ledger(queue_location='redis://queue-host:6379/0')
+    second = open_publish_ledger(queue_location='redis://queue-host:6379/0')
+    assert isinstance(first, RedisPublishLedger)
+    key = 'ab' * 32
+    assert not second.seen(key)
+    first.record(key, 'twitter')
+    first.record(key, 'twitter')
+    assert second.seen(key)
+    assert len(second) == 1
+
+def test_configured_location_wins(shared_redis, tmp_path, monkeypatch):
+    monkeypatch.setenv('PUBLISH_LEDGER', str(tmp_path / 'ledger.db'))
+    ledger = open_publish_ledger(queue_location='redis://queue-host:6379/0')
+    assert isinstance(ledger, PublishLedger)
+    ledger.close()
@@ -0,0 +1,67 @@
+import json
+
+import httpx
+
+from publisher import AsyncPublisher
+from retry_policy import RetryPolicy, is_retryable
+
+def make_post(text: str = 'New drop tonight', key: str = 'key-1'):
+    return {'platform': 'twitter', 'text': text, 'media_path': '/media/clip.mp4',
+            'idempotency_key': key}
+
+def publish(handler, posts):
+    publisher = AsyncPublisher(endpoints={'twitter': 'https://api.twitter.test'},
+                               transport=httpx.MockTransport(handler))
+    reported = []
+    try:
+        results = publisher.submit(posts, lambda post, error: reported.append(post['text'])).result(timeout=10)
+    finally:
+        publisher.close()
+    assert sorted(reported) == sorted(post['text'] for post in posts)
+    return results
+
+def test_success_posts_payload_with_idempotency_key():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(201, json={'id': '1'})
+
+    [(post, error)] = publish(handler, [make_post()])
+    assert error is None
+    assert requests[0].url.path == '/2/tweets'
+    assert requests[0].headers['Idempotency-Key'] == 'key-1'
+    assert json.loads(requests[0].content) == {'text': 'New drop tonight', 'media_path': '/media/clip.mp4'}
+
+def test_rate_limited_post_is_retryable_and_retried_with_same_key():
+    keys = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        keys.append(request.headers['Idempotency-Key'])
+        if len(keys) == 1:
+            return httpx.Response(429, headers={'Retry-After': '120'})
+        return httpx.Response(201)
+
+    post = make_post()
+    [(_, error)] = publish(handler, [post])
+    assert isinstance(error, httpx.HTTPStatusError)
+    assert error.response.status_code == 429
+    policy = RetryPolicy(base_delay=1.0)
+    assert policy.should_retry(error, 0)
+    assert policy.next_delay(0, error) >= 120
+
+    [(_, error)] = publish(handler, [post])
+    assert error is None
+    assert keys == ['key-1', 'key-1']
+
+def test_timeout_is_reported_per_post_and_retryable():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content)['text'] == 'slow':
+            raise httpx.ReadTimeout('timed out', request=request)
+        return httpx.Response(201)
+
+    results = publish(handler, [make_post('slow', 'key-1'), make_post('fast', 'key-2')])
+    errors = {post['text']: error for post, error in results}
+    assert isinstance(errors['slow'], httpx.ReadTimeout)
+    assert is_retryable(errors['slow'])
+    assert errors['fast'] is None
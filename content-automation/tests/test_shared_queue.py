@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+
+import httpx
+
+from content_scheduler import AIContentScheduler
+from media_preflight import MediaPreflight
+from post_queue import SQLitePostQueue
+from publish_ledger import PublishLedger
+from publisher import AsyncPublisher
+
+POSTS = 40
+UNLIMITED = {'twitter': {'requests': 100_000, 'per': 1, 'burst': 100_000,
+                         'account_requests': 100_000, 'account_per': 1}}
+
+class Platform:
+    """Mock API that, like the real ones, creates one post per Idempotency-Key"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter()  # key -> requests received
+        self.created = Counter()   # key -> posts created
+        self.stalled = threading.Event()
+
+    def transport(self, stall: float = 0.0) -> httpx.MockTransport:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            key = request.headers['Idempotency-Key']
+            with self.lock:
+                self.requests[key] += 1
+            if stall:
+                # The worker's process is paused mid-publish, past its lease
+                self.stalled.set()
+                await asyncio.sleep(stall)
+            with self.lock:
+                if not self.created[key]:
+                    self.created[key] = 1
+            return httpx.Response(201)
+        return httpx.MockTransport(handler)
+
+def make_worker(tmp_path, name: str, platform: Platform, lease_seconds: float,
+                acks: list, stall: float = 0.0) -> AIContentScheduler:
+    queue = SQLitePostQueue(str(tmp_path / 'queue.db'), worker_id=name, lease_seconds=lease_seconds)
+    ack = queue.ack
+
+    def recording_ack(post_id: int) -> bool:
+        acked = ack(post_id)
+        acks.append((name, post_id, acked))
+        return acked
+    queue.ack = recording_ack
+    publisher = AsyncPublisher(endpoints={'twitter': 'https://api.twitter.test'},
+                               rate_limits=UNLIMITED, transport=platform.transport(stall))
+    return AIContentScheduler(publisher=publisher, queue=queue,
+                              ledger=PublishLedger(str(tmp_path / 'ledger.db')))
+
+def test_workers_sharing_a_queue_publish_every_post_once(tmp_path):
+    media = tmp_path / 'clip.mp4'
+    media.write_bytes(b'\x00\x00\x00\x18ftypmp42' + b'\x00' * 4096)
+    report = MediaPreflight().check(str(media))
+    due = time.time() - 1
+    producer = SQLitePostQueue(str(tmp_path / 'queue.db'))
+    producer.push_many([
+        ({'platform': 'twitter', 'text': f'post {i}', 'media_path': str(media), 'media': report,
+          'optimized': {'due_at': f'2026-01-01T00:{i:02d}:00'}}, due)
+        for i in range(POSTS)
+    ])
+    ids = set(range(1, POSTS + 1))  # A fresh queue numbers posts from 1
+
+    platform = Platform()
+    acks = []
+    # Claims one post, then stalls 2s without renewing its 0.3s lease
+    paused = make_worker(tmp_path, 'paused', platform, 0.3, acks, stall=2.0)
+    paused.max_in_flight = 1
+    paused.queue.renew = lambda post_ids: 0
+    threads = [threading.Thread(target=paused.schedule_all)]
+    threads[0].start()
+    assert platform.stalled.wait(5)
+    for name in ('worker-1', 'worker-2', 'worker-3'):
+        worker = make_worker(tmp_path, name, platform, 3.0, acks)
+        threads.append(threading.Thread(target=worker.schedule_all))
+        threads[-1].start()
+    for thread in threads:
+        thread.join(30)
+        assert not thread.is_alive()
+
+    # Every post is created on the platform exactly once, and is in the ledger once
+    assert len(platform.created) == POSTS
+    assert set(platform.created.values()) == {1}
+    ledger = PublishLedger(str(tmp_path / 'ledger.db'))
+    assert len(ledger) == POSTS
+    assert all(ledger.seen(key) for key in platform.created)
+
+    # Each post was acked by exactly one worker; the paused worker's late ack was refused
+    successful = Counter(post_id for _, post_id, acked in acks if acked)
+    assert set(successful) == ids
+    assert set(successful.values()) == {1}
+    assert [(name, acked) for name, _, acked in acks if name == 'paused'] == [('paused', False)]
+    assert len(producer) == 0
+    assert producer.dead_letter_count() == 0
+
+    # Only the post whose lease expired mid-publish was ever sent twice
+    # (with the same key, so the platform dropped the repeat)
+    assert sorted(platform.requests.values()) == [1] * (POSTS - 1) + [2]
@@ -0,0 +1,41 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+from slot_allocator import SlotAllocator
+
+SLOTS = [9, 13, 19, 24 + 9, 24 + 19]  # Hours of the week
+
+def test_slots_fill_in_order_and_respect_reservations():
+    allocator = SlotAllocator(capacity=2, min_gap=900)
+    now = datetime.now()
+    first = allocator.allocate('instagram', SLOTS, now)
+    allocator.reserve('instagram', first.timestamp())  # Now full
+    times = [allocator.allocate('instagram', SLOTS, now) for _ in range(20)]
+    assert first not in times
+    assert times == sorted(times)
+    per_slot = Counter(moment.replace(minute=0) for moment in times)
+    assert set(per_slot.values()) == {2}
+    assert all(moment.minute in (0, 15) for moment in times)
+
+def test_passed_slots_are_evicted():
+    allocator = SlotAllocator(capacity=1)
+    now = datetime.now()
+    for week in range(52):
+        after = now + timedelta(weeks=week)
+        for _ in range(len(SLOTS)):
+            assert allocator.allocate('tiktok', SLOTS, after) > after
+        # Only the slots still ahead of `after` are remembered
+        assert len(allocator._used['tiktok']) <= len(SLOTS)
+        assert len(allocator._free['tiktok']) <= 2 * len(SLOTS)
+
+def test_refit_hours_replace_the_old_slots():
+    allocator = SlotAllocator(capacity=2)
+    now = datetime.now()
+    old = [allocator.allocate('twitter', SLOTS, now) for _ in range(3)]
+    refit = [11, 24 + 11, 48 + 11, 72 + 11, 96 + 11, 120 + 11, 144 + 11]
+    new = [allocator.allocate('twitter', refit, now) for _ in range(20)]
+    assert all(moment.hour == 11 for moment in new)
+    # Going back to the old hours still honours the posts already in them
+    again = [allocator.allocate('twitter', SLOTS, now) for _ in range(3)]
+    per_slot = Counter(moment.replace(minute=0) for moment in old + again)
+    assert max(per_slot.values()) <= 2
@@ -0,0 +1,35 @@
+import random
+
+from tag_matcher import TagMatcher
+
+WORDS = ['content', 'creator', 'fans', 'only', 'vip', 'model', 'fit', 'fitness', 'life', 'style']
+
+def random_tag(rng: random.Random) -> str:
+    return '#' + ''.join(word.capitalize() for word in rng.sample(WORDS, rng.randint(1, 3)))
+
+def test_churn_prunes_trie_and_matches_like_a_fresh_index():
+    rng = random.Random(7)
+    matcher = TagMatcher()
+    live = []
+    peak = 0
+    keywords = ['contentcreators', 'onlyfans', 'fitnesslife', 'vipmodel', 'style']
+    for _ in range(300):
+        trending = sorted({random_tag(rng) for _ in range(20)})
+        matcher.sync('trending', trending)
+        live = trending
+        fresh = TagMatcher()
+        fresh.sync('trending', live)
+        for keyword in keywords:
+            assert matcher.match([keyword], 'trending') == fresh.match([keyword], 'trending')
+        peak = max(peak, len(fresh._goto))
+    # Nodes freed by churn are reused: the trie stays the size of its busiest list
+    assert len(matcher._goto) - len(matcher._free) == len(fresh._goto)
+    assert len(matcher._goto) <= 2 * peak
+
+def test_removing_every_tag_leaves_only_the_root():
+    matcher = TagMatcher()
+    matcher.sync('trending', ['#ContentCreator', '#Content', '#Creator'])
+    assert matcher.match(['contentcreator']) == ['#ContentCreator', '#Content', '#Creator']
+    matcher.sync('trending', [])
+    assert matcher.match(['contentcreator']) == []
+    assert len(matcher._goto) - len(matcher._free) == 1
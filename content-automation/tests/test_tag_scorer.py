@@ -0,0 +1,44 @@
+import random
+
+from hashtag_generator import AIHashtagGenerator
+from hashtag_model import HashtagModel
+
+CAPTIONS = [
+    "New exclusive content just dropped! Check out my latest photos and videos.",
+    "Behind the scenes with TheSteeleZone crew, subscribe for VIP access",
+    "Daily lifestyle vlog with my amazing community of fans",
+    "Big announcement coming soon!",
+]
+PLATFORMS = ['instagram', 'twitter', 'tiktok', 'onlyfans']
+
+def requests(generator, rng, count):
+    tags = sorted({tag for tags in generator.niche_tags['platform_specific'].values() for tag in tags}
+                  | set(generator.trending_hashtags) | {'#Exclusive', '#Photos', '#Vlog', '#Crew'})
+    return [(rng.sample(tags, rng.randrange(0, 40)), rng.choice(PLATFORMS),
+             rng.choice([None, 0, 3, 10]), rng.choice(CAPTIONS).lower())
+            for _ in range(count)]
+
+def test_rank_batch_matches_rank_per_request():
+    generator = AIHashtagGenerator(weights={'tiktok': {'trending': 0.5, 'relevance': 0.6}})
+    batch = requests(generator, random.Random(3), 200)
+    assert generator.scorer.rank_batch(batch) == [generator.scorer.rank(*request) for request in batch]
+
+def test_rank_batch_adds_learned_lifts():
+    model = HashtagModel()
+    rng = random.Random(5)
+    for _ in range(300):
+        model.update(rng.choice(PLATFORMS), rng.sample(['#VIP', '#Vlog', '#FYP', '#Tweet'], 2),
+                     rng.uniform(0, 100))
+    generator = AIHashtagGenerator(model=model)
+    batch = requests(generator, rng, 200)
+    assert generator.scorer.rank_batch(batch) == [generator.scorer.rank(*request) for request in batch]
+
+def test_generate_batch_matches_generate():
+    generator = AIHashtagGenerator(seed=11)
+    posts = [{'text': f'{CAPTIONS[i % 4]} drop{i % 7}', 'platform': PLATFORMS[i % 4],
+              'content_type': 'exclusive'} for i in range(40)]
+    batch = generator.generate_batch(posts)
+    generator.cache.clear()
+    assert [result['hashtags'] for result in batch] == [
+        generator.generate(post['text'], post['platform'], post['content_type']) for post in posts]
+    assert generator.generate_batch(posts) == batch
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Engagement Aggregates - Running Report Statistics
+Keeps per-hour, per-group engagement stats current as posts are tracked
+"""
+
+import numpy as np
+from typing import List, Dict, Tuple, Optional, Union
+
+HOUR_US = 3_600_000_000
+
+# Summed per group alongside the engagement score stats
+TOTALS = ('likes', 'comments', 'shares')
+
+class GroupStats:
+    """
+    Post count, Welford mean and M2, min and max of the engagement score,
+    and counter totals, one entry per group code. Two sets of stats over
+    disjoint posts merge exactly (Chan et al.), so buckets and loose posts
+    combine into the stats of a whole window.
+    """
+
+    def __init__(self, size: int):
+        self.count = np.zeros(size)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+        self.totals = {name: np.zeros(size) for name in TOTALS}
+
+    @classmethod
+    def of_posts(cls, codes: np.ndarray, scores: np.ndarray,
+                 totals: Dict[str, np.ndarray], size: int) -> 'GroupStats':
+        """Stats of individual posts (group code, score and counters per post)"""
+        stats = cls(size)
+        if not len(codes):
+            return stats
+        stats.count = np.bincount(codes, minlength=size).astype(float)
+        present = stats.count > 0
+        sums = np.bincount(codes, weights=scores, minlength=size)
+        stats.mean[present] = sums[present] / stats.count[present]
+        stats.m2 = np.bincount(codes, weights=(scores - stats.mean[codes]) ** 2, minlength=size)
+        np.minimum.at(stats.min, codes, scores)
+        np.maximum.at(stats.max, codes, scores)
+        for name in TOTALS:
+            stats.totals[name] = np.bincount(codes, weights=totals[name], minlength=size)
+        return stats
+
+    def merge(self, other: 'GroupStats') -> 'GroupStats':
+        """Stats of both sets of posts combined"""
+        size = max(len(self.count), len(other.count))
+        first, second = self._padded(size), other._padded(size)
+        merged = GroupStats(size)
+        merged.count = first.count + second.count
+        present = merged.count > 0
+        delta = second.mean - first.mean
+        share = np.zeros(size)
+        share[present] = second.count[present] / merged.count[present]
+        merged.mean = first.mean + delta * share
+        merged.m2 = first.m2 + second.m2 + delta ** 2 * first.count * share
+        merged.min = np.minimum(first.min, second.min)
+        merged.max = np.maximum(first.max, second.max)
+        merged.totals = {name: first.totals[name] + second.totals[name] for name in TOTALS}
+        return merged
+
+    def _padded(self, size: int) -> 'GroupStats':
+        if len(self.count) == size:
+            return self
+        padded = GroupStats(size)
+        used = len(self.count)
+        for name in ('count', 'mean', 'm2', 'min', 'max'):
+            getattr(padded, name)[:used] = getattr(self, name)
+        for name in TOTALS:
+            padded.totals[name][:used] = self.totals[name]
+        return padded
+
+    def report(self, names: List[str]) -> Dict[str, Dict]:
+        """Report dict per group that has posts, keyed by group name"""
+        stats = {}
+        for code in np.flatnonzero(self.count).tolist():
+            count = int(self.count[code])
+            stats[names[code]] = {
+                'post_count': count,
+                'avg_engagement': round(self.mean.item(code), 2),
+                'engagement_stddev': round((self.m2.item(code) / (count - 1)) ** 0.5, 2) if count > 1 else 0.0,
+                'min_engagement': round(self.min.item(code), 2),
+                'max_engagement': round(self.max.item(code), 2),
+                **{f'total_{name}': int(self.totals[name][code]) for name in TOTALS}
+            }
+        return stats
+
+# Per-bucket, per-group fields of RunningAggregates
+FIELDS = ('count', 'mean', 'm2', 'min', 'max') + TOTALS
+
+class RunningAggregates:
+    """
+    Running GroupStats per time bucket (an hour by default) for every
+    group kind (platform, content type), plus each bucket's best posts.
+    Tracking a post is O(1) per kind; the stats of a run of buckets
+    take one vectorized merge over them, so a report window costs
+    O(buckets), not O(posts). Buckets are sparse: a row is allocated
+    only for a bucket that gets posts, found through a dict keyed by
+    bucket number, so one far-past or bogus timestamp costs a row rather
+    than every bucket between it and the rest. While buckets arrive in
+    time order (tracking live) the rows of a window are a plain slice;
+    after a backfill they are picked through a sorted index.
+    The bucket posts are landing in (the current hour, when tracking
+    live) is kept as plain lists and written back before any query.
+    """
+
+    def __init__(self, kinds: Tuple[str, ...] = ('platform', 'content_type'),
+                 width: int = HOUR_US, top: int = 5):
+        """
+        Args:
+            kinds: Group kinds, each tracked with its own code per post
+            width: Bucket width in microseconds
+            top: Best posts kept per bucket (the most a report can ask for)
+        """
+        self.kinds = kinds
+        self.width = width
+        self.top = top
+        self.span = 0      # Rows in use
+        self._row_of = {}  # bucket number -> row
+        self._buckets = np.zeros(0, dtype=np.int64)  # Bucket number of each row
+        self._in_order = True   # Whether rows are in bucket order
+        self._index = None      # (bucket numbers ascending, their rows), once out of order
+        # kind -> (bucket row, group code, field) array
+        self._stats = {kind: self._empty(0, 4) for kind in kinds}
+        self._top_scores = np.full((0, top), -np.inf)
+        self._top_rows = np.full((0, top), -1, dtype=np.int64)
+        self._open = None         # Row held in _open_stats / _open_top
+        self._open_bucket = None  # Its bucket number
+        self._open_stats = {}     # kind -> [fields per group code]
+        self._open_top = None     # (scores, rows)
+
+    @staticmethod
+    def _empty(rows: int, codes: int) -> np.ndarray:
+        stats = np.zeros((rows, codes, len(FIELDS)))
+        stats[:, :, FIELDS.index('min')] = np.inf
+        stats[:, :, FIELDS.index('max')] = -np.inf
+        return stats
+
+    def bucket(self, timestamp: int) -> int:
+        """Bucket number holding an epoch-microsecond timestamp"""
+        return timestamp // self.width
+
+    def add(self, row: int, timestamp: int, codes: Tuple[int, ...], score: float,
+            totals: Tuple[int, ...]):
+        """
+        Fold one post into its bucket.
+
+        Args:
+            row: The post's store row
+            timestamp: Epoch microseconds
+            codes: The post's group code for each kind, in `kinds` order
+            score: Engagement score
+            totals: The post's counters, in TOTALS order
+        """
+        bucket = self.bucket(timestamp)
+        if bucket != self._open_bucket:
+            self.flush()
+            self._reopen(self._row(bucket), bucket)
+        for kind, code in zip(self.kinds, codes):
+            cells = self._open_stats[kind]
+            if code >= len(cells):
+                position = self._open
+                self.flush()
+                stats = self._stats[kind]
+                self._stats[kind] = self._widened(stats, max(code + 1, stats.shape[1] * 2))
+                self._reopen(position, bucket)
+                cells = self._open_stats[kind]
+            cell = cells[code]
+            count = cell[0] + 1
+            mean = cell[1]
+            delta = score - mean
+            mean += delta / count
+            cell[0] = count
+            cell[1] = mean
+            cell[2] += delta * (score - mean)
+            if score < cell[3]:
+                cell[3] = score
+            if score > cell[4]:
+                cell[4] = score
+            cell[5] += totals[0]
+            cell[6] += totals[1]
+            cell[7] += totals[2]
+        # Best posts of the bucket; on equal scores the earlier row stays
+        scores, rows = self._open_top
+        lowest = min(scores)
+        if score > lowest:
+            slot = max((slot for slot, value in enumerate(scores) if value == lowest),
+                       key=rows.__getitem__)
+            scores[slot] = score
+            rows[slot] = row
+
+    def _reopen(self, position: int, bucket: int):
+        self._open = position
+        self._open_bucket = bucket
+        self._open_stats = {kind: stats[position].tolist() for kind, stats in self._stats.items()}
+        self._open_top = (self._top_scores[position].tolist(), self._top_rows[position].tolist())
+
+    def flush(self):
+        """Write the open bucket back to the arrays"""
+        if self._open is None:
+            return
+        for kind, cells in self._open_stats.items():
+            self._stats[kind][self._open] = cells
+        self._top_scores[self._open], self._top_rows[self._open] = self._open_top
+        self._open = None
+        self._open_bucket = None
+
+    def _row(self, bucket: int) -> int:
+        """Row of `bucket`, allocating one if it has none yet"""
+        row = self._row_of.get(bucket)
+        if row is not None:
+            return row
+        row = self.span
+        if row == len(self._buckets):
+            self._resize(max(row * 2, 16))
+        if row and bucket < self._buckets[row - 1]:
+            self._in_order = False
+        self._buckets[row] = bucket
+        self._row_of[bucket] = row
+        self._index = None
+        self.span = row + 1
+        return row
+
+    def _resize(self, rows: int):
+        """Reallocate to `rows` rows, keeping the ones in use"""
+        for kind, stats in self._stats.items():
+            grown = self._empty(rows, stats.shape[1])
+            grown[:self.span] = stats[:self.span]
+            self._stats[kind] = grown
+        top_scores = np.full((rows, self.top), -np.inf)
+        top_rows = np.full((rows, self.top), -1, dtype=np.int64)
+        top_scores[:self.span] = self._top_scores[:self.span]
+        top_rows[:self.span] = self._top_rows[:self.span]
+        self._top_scores, self._top_rows = top_scores, top_rows
+        buckets = np.zeros(rows, dtype=np.int64)
+        buckets[:self.span] = self._buckets[:self.span]
+        self._buckets = buckets
+
+    def _widened(self, stats: np.ndarray, codes: int) -> np.ndarray:
+        widened = self._empty(len(stats), codes)
+        widened[:, :stats.shape[1]] = stats
+        return widened
+
+    def _sorted(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Bucket numbers in use, ascending, and their rows (None while rows are in order)"""
+        if self._in_order:
+            return self._buckets[:self.span], None
+        if self._index is None:
+            order = np.argsort(self._buckets[:self.span], kind='stable')
+            self._index = (self._buckets[order], order)
+        return self._index
+
+    def bounds(self) -> Tuple[int, int]:
+        """First bucket with posts and the bucket after the last; (0, 0) when empty"""
+        if not self.span:
+            return 0, 0
+        buckets = self._sorted()[0]
+        return buckets[0].item(), buckets[-1].item() + 1
+
+    def _rows(self, first: int, last: int) -> Union[slice, np.ndarray]:
+        """Rows of the buckets in [first, last) that have posts, in bucket order"""
+        buckets, order = self._sorted()
+        start, stop = np.searchsorted(buckets, (first, last)).tolist()
+        return slice(start, stop) if order is None else order[start:stop]
+
+    def stats(self, kind: str, first: int, last: int) -> GroupStats:
+        """Merged stats of buckets [first, last), one entry per group code"""
+        self.flush()
+        stats = self._stats[kind][self._rows(first, last)]
+        count, mean = stats[:, :, 0], stats[:, :, 1]
+        merged = GroupStats(stats.shape[1])
+        merged.count = count.sum(axis=0)
+        present = merged.count > 0
+        sums = (mean * count).sum(axis=0)
+        merged.mean[present] = sums[present] / merged.count[present]
+        # Within-bucket spread plus each bucket's distance from the overall mean
+        spread = count * (mean - merged.mean) ** 2
+        merged.m2 = stats[:, :, 2].sum(axis=0) + spread.sum(axis=0)
+        merged.min = stats[:, :, 3].min(axis=0, initial=np.inf)
+        merged.max = stats[:, :, 4].max(axis=0, initial=-np.inf)
+        merged.totals = {name: stats[:, :, FIELDS.index(name)].sum(axis=0) for name in TOTALS}
+        return merged
+
+    def timeline(self, first: int, last: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Bucket number, post count and engagement sum of each bucket in [first, last) with posts"""
+        self.flush()
+        rows = self._rows(first, last)
+        stats = self._stats[self.kinds[0]][rows]
+        count = stats[:, :, 0]
+        return self._buckets[rows], count.sum(axis=1), (stats[:, :, 1] * count).sum(axis=1)
+
+    def best_rows(self, first: int, last: int) -> np.ndarray:
+        """Store rows of the best posts of every bucket in [first, last)"""
+        self.flush()
+        rows = self._top_rows[self._rows(first, last)].ravel()
+        return rows[rows >= 0]
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Copy of the buckets in use as named arrays (see from_state)"""
+        self.flush()
+        state = {f'stats_{kind}': stats[:self.span].copy() for kind, stats in self._stats.items()}
+        state['top_scores'] = self._top_scores[:self.span].copy()
+        state['top_rows'] = self._top_rows[:self.span].copy()
+        state['buckets'] = self._buckets[:self.span].copy()
+        state['kinds'] = np.array(self.kinds, dtype=str)
+        state['settings'] = np.array([self.width, self.top], dtype=np.int64)
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> 'RunningAggregates':
+        """Aggregates restored from state(), with room for no further buckets yet"""
+        settings = state['settings'].tolist()
+        aggregates = cls(tuple(state['kinds'].tolist()), *settings[:2])
+        aggregates._stats = {kind: state[f'stats_{kind}'] for kind in aggregates.kinds}
+        aggregates._top_scores = state['top_scores']
+        aggregates._top_rows = state['top_rows']
+        aggregates.span = len(aggregates._top_rows)
+        if 'buckets' in state:
+            aggregates._buckets = state['buckets']
+        else:
+            # Written when buckets were dense rows from an origin bucket
+            aggregates._buckets = np.arange(settings[2], settings[2] + settings[3], dtype=np.int64)
+        buckets = aggregates._buckets.tolist()
+        aggregates._row_of = dict(zip(buckets, range(len(buckets))))
+        aggregates._in_order = all(a < b for a, b in zip(buckets, buckets[1:]))
+        return aggregates
+
+    def nbytes(self) -> int:
+        return (sum(stats.nbytes for stats in self._stats.values())
+                + self._top_scores.nbytes + self._top_rows.nbytes)
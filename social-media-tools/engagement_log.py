@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Engagement Log - Durable Post History
+Appends tracked posts to segment files and restarts from compacted snapshots
+"""
+
+import os
+import re
+import sys
+import mmap
+import time
+import zlib
+import atexit
+import struct
+import tempfile
+import threading
+import numpy as np
+from datetime import datetime
+from typing import List, Tuple, Iterable, Optional
+
+from engagement_store import EngagementStore, CODEBOOKS, epoch_us
+
+# Record frame: CRC-32 of the body, body length; the body is a type byte and its payload
+_FRAME = struct.Struct('<II')
+# Post payload (timestamp, platform and content type codes, counters, score),
+# followed by one int32 code per hashtag
+_POST = struct.Struct('<qhhiiiqd')
+# Record types: a post, or the next name of CODEBOOKS[type - 1]
+_POST_RECORD = 0
+
+_FILE = re.compile(r'(segment|snapshot)-(\d+)\.(?:log|npz)$')
+
+class EngagementLog:
+    """
+    Durable history of an EngagementStore: a directory of append-only
+    segment files plus snapshots of the whole store.
+    Each tracked post is one small binary record (about 60 bytes) with a
+    CRC, preceded by a record for any platform, content type or hashtag
+    name it introduced, so codes replay exactly. Writes are buffered and
+    fsynced in batches (every `sync_every` posts or `sync_interval`
+    seconds, whichever comes first) rather than per post.
+    Once a segment holds `segment_posts` posts the log moves on to a new
+    one. When the posts logged since the last snapshot reach
+    `snapshot_ratio` of the posts in it (and at least one segment's
+    worth), a background thread writes snapshot-N (the store's columns,
+    codebooks and running aggregates as of segment N) and then deletes
+    the segments and snapshots it covers. Snapshots thus grow
+    geometrically apart, keeping the total bytes written linear in the
+    history rather than quadratic. Opening the log loads the newest
+    snapshot as arrays, with no per-post parsing, and replays only the
+    segments after it (at most `snapshot_ratio` of the history), read
+    through mmap.
+    A torn record at the end of the newest segment (a crash mid-write)
+    fails its CRC and is cut off on replay; a bad record anywhere else
+    is corruption and raises ValueError rather than losing the posts
+    after it.
+    """
+
+    def __init__(self, directory: str, sync_every: int = 256, sync_interval: float = 1.0,
+                 segment_posts: int = 16384, snapshot_ratio: float = 0.25):
+        """
+        Args:
+            directory: Log directory (created if missing)
+            sync_every: Posts written before an fsync
+            sync_interval: Seconds before an fsync, if fewer posts arrived
+            segment_posts: Posts per segment before moving on to the next
+            snapshot_ratio: New posts, as a fraction of the last snapshot's,
+                before taking the next snapshot
+        """
+        self.directory = directory
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.segment_posts = segment_posts
+        self.snapshot_ratio = snapshot_ratio
+        os.makedirs(directory, exist_ok=True)
+        self._compactor = None
+        self.store, self.segment, self._segment_count, self._snapshot_posts = self._load()
+        self._logged = [len(getattr(self.store, kind)) for kind in CODEBOOKS]
+        self._file = open(self._path('segment', self.segment), 'ab')
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        atexit.register(self.close)
+
+    def _path(self, kind: str, number: int) -> str:
+        extension = 'log' if kind == 'segment' else 'npz'
+        return os.path.join(self.directory, f'{kind}-{number:06d}.{extension}')
+
+    def _numbered(self, kind: str) -> List[int]:
+        """Numbers of the directory's segments or snapshots, ascending"""
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = _FILE.match(name)
+            if match and match.group(1) == kind:
+                numbers.append(int(match.group(2)))
+        return sorted(numbers)
+
+    def _load(self) -> Tuple[EngagementStore, int, int, int]:
+        """(store, segment to append to, posts already in it, posts in the snapshot)"""
+        snapshots = self._numbered('snapshot')
+        first = snapshots[-1] if snapshots else 0
+        store = EngagementStore()
+        if snapshots:
+            with np.load(self._path('snapshot', first)) as snapshot:
+                store = EngagementStore.from_state(dict(snapshot))
+        snapshot_posts = len(store)
+        segments = [number for number in self._numbered('segment') if number >= first] or [first]
+        posts = 0
+        for number in segments:
+            posts = self._replay(store, self._path('segment', number), last=number == segments[-1])
+        return store, segments[-1], posts, snapshot_posts
+
+    @staticmethod
+    def _replay(store: EngagementStore, path: str, last: bool = True) -> int:
+        """
+        Add one segment's posts to `store`; returns how many. A bad record
+        is truncated away only as the torn tail of the `last` segment.
+        """
+        if not os.path.exists(path) or not os.path.getsize(path):
+            return 0
+        codebooks = [getattr(store, kind) for kind in CODEBOOKS]
+        platforms, content_types, tags = (codebook.names for codebook in codebooks)
+        posts = 0
+        offset = 0
+        with open(path, 'rb') as segment:
+            with mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                size = len(view)
+                while offset + _FRAME.size <= size:
+                    crc, length = _FRAME.unpack_from(view, offset)
+                    start = offset + _FRAME.size
+                    body = view[start:start + length]
+                    if not length or len(body) < length or zlib.crc32(body) != crc:
+                        break
+                    if body[0] == _POST_RECORD:
+                        (timestamp, platform, content_type, likes, comments, shares, views,
+                         score) = _POST.unpack_from(body, 1)
+                        codes = struct.unpack_from(f'<{(length - 1 - _POST.size) // 4}i', body, 1 + _POST.size)
+                        store.add(platforms[platform], timestamp, likes, comments, shares, views, score,
+                                  content_types[content_type], [tags[code] for code in codes])
+                        posts += 1
+                    else:
+                        codebooks[body[0] - 1].code(body[1:].decode('utf-8'))
+                    offset = start + length
+        if offset < size:
+            if not last or not EngagementLog._torn(path, offset, size):
+                raise ValueError(f'{path} is corrupt at byte {offset}')
+            print(f"⚠️ Dropping {size - offset} bytes of incomplete records from {os.path.basename(path)}")
+            os.truncate(path, offset)
+        return posts
+
+    @staticmethod
+    def _torn(path: str, offset: int, size: int) -> bool:
+        """
+        Whether the bad record at `offset` is a write cut short by a crash:
+        it runs past the end of the file, is the file's final record, or
+        starts a zero-filled tail
+        """
+        with open(path, 'rb') as segment:
+            segment.seek(offset)
+            tail = segment.read()
+        if len(tail) < _FRAME.size:
+            return True
+        length = _FRAME.unpack_from(tail)[1]
+        return _FRAME.size + length >= size - offset or not tail.strip(b'\x00')
+
+    def add(self, platform: str, timestamp: int, likes: int = 0, comments: int = 0,
+            shares: int = 0, views: int = 0, engagement_score: float = 0.0,
+            content_type: str = 'general', hashtags: Iterable[str] = ()) -> int:
+        """Store one post (as EngagementStore.add) and log it; returns its index"""
+        hashtags = list(hashtags)
+        store = self.store
+        index = store.add(platform, timestamp, likes, comments, shares, views,
+                          engagement_score, content_type, hashtags)
+        for position, kind in enumerate(CODEBOOKS):
+            names = getattr(store, kind).names
+            for name in names[self._logged[position]:]:
+                self._write(position + 1, name.encode('utf-8'))
+            self._logged[position] = len(names)
+        codes = [store.tags.codes[tag] for tag in hashtags]
+        self._write(_POST_RECORD, _POST.pack(
+            timestamp, store.platforms.codes[platform], store.content_types.codes[content_type],
+            int(likes), int(comments), int(shares), int(views), engagement_score
+        ) + struct.pack(f'<{len(codes)}i', *codes))
+        self._unsynced += 1
+        self._segment_count += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+        if self._segment_count >= self.segment_posts:
+            due = max(self.segment_posts, self.snapshot_ratio * self._snapshot_posts)
+            if len(store) - self._snapshot_posts >= due and not self.compacting():
+                self.compact()
+            else:
+                self._next_segment()
+        return index
+
+    def _write(self, kind: int, payload: bytes):
+        body = bytes((kind,)) + payload
+        self._file.write(_FRAME.pack(zlib.crc32(body), len(body)) + body)
+
+    def sync(self):
+        """Flush buffered records to disk"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def compacting(self) -> bool:
+        """Whether a snapshot is still being written"""
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def compact(self, wait: bool = False):
+        """
+        Start a new segment and snapshot everything before it in the
+        background; the covered segments are deleted once the snapshot
+        is on disk. Waits for a compaction already running first.
+        """
+        if self._compactor is not None:
+            self._compactor.join()
+        if self._segment_count:
+            self._next_segment()
+        # Taken now, in this thread: the snapshot must match the segments it replaces
+        state = self.store.state()
+        self._snapshot_posts = len(self.store)
+        self._compactor = threading.Thread(target=self._write_snapshot, args=(self.segment, state),
+                                           name='engagement-log-compactor')
+        self._compactor.start()
+        if wait:
+            self._compactor.join()
+
+    def _next_segment(self):
+        """Close the current segment and append to a new one"""
+        self.sync()
+        self._file.close()
+        self.segment += 1
+        self._segment_count = 0
+        self._file = open(self._path('segment', self.segment), 'ab')
+        self._sync_directory()
+
+    def _write_snapshot(self, number: int, state):
+        path = self._path('snapshot', number)
+        fd, temp_path = tempfile.mkstemp(prefix='.snapshot-', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                np.savez(out, **state)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._sync_directory()
+        for kind in ('segment', 'snapshot'):
+            for old in self._numbered(kind):
+                if old < number:
+                    os.remove(self._path(kind, old))
+
+    def _sync_directory(self):
+        """Make created, renamed and deleted files durable (POSIX only)"""
+        if hasattr(os, 'O_DIRECTORY'):
+            fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def close(self):
+        """Sync the open segment and wait for any compaction"""
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+        if self._compactor is not None:
+            self._compactor.join()
+        atexit.unregister(self.close)
+
+def open_engagement_log(directory: Optional[str] = None) -> Optional[EngagementLog]:
+    """Open `directory` (or ENGAGEMENT_LOG); None when no log is configured"""
+    directory = directory or os.getenv('ENGAGEMENT_LOG')
+    return EngagementLog(directory) if directory else None
+
+def run_log_benchmark(days: int = 3 * 365, posts_per_day: int = 300):
+    """Append cost and cold-start time of a log holding years of history"""
+    platforms = ['instagram', 'twitter', 'tiktok', 'onlyfans']
+    content_types = ['photo', 'video', 'text', 'exclusive']
+    hashtags = [['#TheSteeleZone', '#ContentCreator', '#Exclusive'], ['#Vlog', '#Lifestyle'], []]
+    start = epoch_us(datetime(2024, 1, 1))
+    step = 86_400_000_000 // posts_per_day
+    post_count = days * posts_per_day
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"\n🗄️ Engagement log: {post_count:,} posts ({days / 365:.0f} years)")
+        print("=" * 60)
+        log = EngagementLog(directory)
+        began = time.perf_counter()
+        for i in range(post_count):
+            log.add(platforms[i % 4], start + i * step, 500 + i % 1000, 40 + i % 90, i % 60,
+                    2000 + i % 7000, round(20 + (i % 997) / 10, 2), content_types[i % 4], hashtags[i % 3])
+        log.close()
+        elapsed = time.perf_counter() - began
+        files = sorted(os.listdir(directory))
+        disk = sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        print(f"   Append:     {elapsed / post_count * 1e6:6.1f} µs/post (fsync every {log.sync_every} posts)")
+        print(f"   On disk:    {disk / 1e6:6.1f} MB in {', '.join(files)}")
+
+        best = float('inf')
+        for _ in range(3):
+            began = time.perf_counter()
+            reopened = EngagementLog(directory)
+            best = min(best, time.perf_counter() - began)
+            reopened.close()
+        tail = len(reopened.store) - reopened._snapshot_posts
+        print(f"   Cold start: {best * 1000:6.1f} ms (snapshot + {tail:,} replayed posts)")
+        before, after = (store.summarize_between(top=5) for store in (log.store, reopened.store))
+        same = (before.pop('top').tolist() == after.pop('top').tolist() and before == after
+                and reopened.store[-1] == log.store[-1])
+        print(f"   Restored {len(reopened.store):,} posts, reports match: {same}")
+
+if __name__ == '__main__':
+    if '--benchmark' in sys.argv:
+        run_log_benchmark()
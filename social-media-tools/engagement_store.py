@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Engagement Store - Columnar Post History
+Keeps tracked posts in NumPy columns instead of one dict per post
+"""
+
+import sys
+import time
+import tracemalloc
+import numpy as np
+from datetime import datetime
+from collections.abc import Sequence
+from typing import List, Dict, Tuple, Iterable, Optional, Union
+
+from engagement_aggregates import GroupStats, RunningAggregates, TOTALS
+
+COUNTERS = ('likes', 'comments', 'shares', 'views')
+
+# Views can pass 2**31 on a viral post; the other counters can't realistically
+_COUNTER_TYPES = {'likes': np.int32, 'comments': np.int32, 'shares': np.int32, 'views': np.int64}
+
+# Codebook attributes; a log records new names by position in this tuple
+CODEBOOKS = ('platforms', 'content_types', 'tags')
+
+def epoch_us(moment: datetime) -> int:
+    """Naive local datetime -> microseconds since the epoch (exact, unlike timestamp() * 1e6)"""
+    return int(moment.replace(microsecond=0).timestamp()) * 1_000_000 + moment.microsecond
+
+def from_epoch_us(value: int) -> datetime:
+    """Microseconds since the epoch -> naive local datetime"""
+    seconds, micros = divmod(value, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micros)
+
+class Codebook:
+    """Names (platforms, content types, hashtags) <-> small integer codes"""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names = []
+        self.codes = {}
+        for name in names:
+            self.code(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def code(self, name: str) -> int:
+        """Code of `name`, assigning the next one if it's new"""
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def get(self, name: str) -> Optional[int]:
+        """Code of `name`, None if it was never seen"""
+        return self.codes.get(name)
+
+class EngagementStore(Sequence):
+    """
+    Tracked posts stored column by column: int64 epoch-microsecond
+    timestamps, int16 platform and content type codes, integer counters
+    and the float64 engagement score, plus each post's hashtags as codes
+    into a shared tag list. Columns double in size when full, so appends
+    are amortized O(1), and a post costs about 55 bytes instead of the
+    ~500 of a dict with its strings.
+    Indexing returns the dict track_post used to store, built on access,
+    so code written against a list of dicts keeps working.
+    Time windows are found by binary search over the timestamps: posts
+    tracked live arrive in time order, so the column is its own index;
+    an out-of-order append (backfills) switches to a sorted row order
+    that is extended as posts arrive.
+    Every append also updates hourly running aggregates, so report
+    summaries over long windows read buckets instead of posts.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.platforms = Codebook()
+        self.content_types = Codebook()
+        self.tags = Codebook()
+        self._size = 0
+        self._tag_count = 0
+        self._columns = {
+            'timestamp': np.zeros(capacity, dtype=np.int64),
+            'platform': np.zeros(capacity, dtype=np.int16),
+            'content_type': np.zeros(capacity, dtype=np.int16),
+            **{counter: np.zeros(capacity, dtype=dtype) for counter, dtype in _COUNTER_TYPES.items()},
+            'engagement_score': np.zeros(capacity),
+        }
+        # Post i's hashtags are _tag_codes[_tag_offsets[i]:_tag_offsets[i + 1]]
+        self._tag_offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self._tag_codes = np.zeros(capacity * 4, dtype=np.int32)
+        self._in_order = True
+        self._latest = np.iinfo(np.int64).min
+        self._order = None    # Row order by time, once rows are out of order
+        self._sorted = None   # Timestamps in that order
+        self._indexed = 0     # Rows covered by _order
+        self.aggregates = RunningAggregates()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        if isinstance(index, slice):
+            return self.records(range(*index.indices(self._size)))
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('post index out of range')
+        return self.record(index)
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one column ('timestamp', 'platform', 'likes', ...)"""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def record(self, index: int) -> Dict:
+        """Post `index` as a dict"""
+        columns = self._columns
+        start, end = self._tag_offsets[index:index + 2].tolist()
+        tags = self.tags.names
+        return {
+            'platform': self.platforms.names[columns['platform'][index]],
+            'timestamp': from_epoch_us(columns['timestamp'][index].item()).isoformat(),
+            **{counter: columns[counter][index].item() for counter in COUNTERS},
+            'engagement_score': columns['engagement_score'][index].item(),
+            'content_type': self.content_types.names[columns['content_type'][index]],
+            'hashtags': [tags[code] for code in self._tag_codes[start:end].tolist()]
+        }
+
+    def records(self, indices: Iterable[int]) -> List[Dict]:
+        """Posts at `indices` as dicts"""
+        return [self.record(index) for index in indices]
+
+    def add(self, platform: str, timestamp: int, likes: int = 0, comments: int = 0,
+            shares: int = 0, views: int = 0, engagement_score: float = 0.0,
+            content_type: str = 'general', hashtags: Iterable[str] = ()) -> int:
+        """Store one post (timestamp in epoch microseconds); returns its index"""
+        index = self._size
+        if index == len(self._columns['timestamp']):
+            self._grow(max(index * 2, 16))
+        codes = [self.tags.code(tag) for tag in hashtags]
+        end = self._tag_count + len(codes)
+        if end > len(self._tag_codes):
+            self._tag_codes = self._resized(self._tag_codes, max(end, len(self._tag_codes) * 2))
+        self._tag_codes[self._tag_count:end] = codes
+        self._tag_count = end
+        self._tag_offsets[index + 1] = end
+        if timestamp < self._latest:
+            self._in_order = False
+        else:
+            self._latest = timestamp
+        columns = self._columns
+        codes = {'platform': self.platforms.code(platform),
+                 'content_type': self.content_types.code(content_type)}
+        columns['timestamp'][index] = timestamp
+        columns['platform'][index] = codes['platform']
+        columns['content_type'][index] = codes['content_type']
+        columns['likes'][index] = likes
+        columns['comments'][index] = comments
+        columns['shares'][index] = shares
+        columns['views'][index] = views
+        columns['engagement_score'][index] = engagement_score
+        self._size = index + 1
+        self.aggregates.add(index, timestamp, (codes['platform'], codes['content_type']),
+                            engagement_score, (likes, comments, shares))
+        return index
+
+    def append(self, record: Dict) -> int:
+        """Store a post given as a dict (timestamp as ISO string, datetime or epoch seconds)"""
+        timestamp = record.get('timestamp')
+        if timestamp is None:
+            timestamp = datetime.now()
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        if isinstance(timestamp, datetime):
+            timestamp = epoch_us(timestamp)
+        else:
+            timestamp = round(timestamp * 1_000_000)
+        return self.add(record['platform'], timestamp,
+                        *(record.get(counter, 0) for counter in COUNTERS),
+                        record.get('engagement_score', 0.0),
+                        record.get('content_type', 'general'),
+                        record.get('hashtags', ()))
+
+    def _time_index(self) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """(row order, timestamps in that order); the order is None while rows are in time order"""
+        timestamps = self._columns['timestamp'][:self._size]
+        if self._in_order:
+            return None, timestamps
+        if self._indexed < self._size:
+            new = np.arange(self._indexed, self._size)
+            new = new[np.argsort(timestamps[new], kind='stable')]
+            if self._order is not None and (not len(self._sorted) or timestamps[new[0]] >= self._sorted[-1]):
+                # Everything since the last query is newer: extend instead of re-sorting
+                self._order = np.concatenate((self._order, new))
+            else:
+                self._order = np.argsort(timestamps, kind='stable')
+            self._sorted = timestamps[self._order]
+            self._indexed = self._size
+        return self._order, self._sorted
+
+    def window(self, start: Optional[int] = None, end: Optional[int] = None,
+               platform: Optional[str] = None) -> np.ndarray:
+        """
+        Indices of the posts with start <= timestamp < end (epoch
+        microseconds, either bound optional), oldest first, optionally for
+        one platform. O(log n + posts in the window).
+        """
+        order, timestamps = self._time_index()
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, 'left'))
+        last = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, 'left'))
+        last = max(first, last)
+        indices = np.arange(first, last) if order is None else order[first:last]
+        if platform is not None:
+            code = self.platforms.get(platform)
+            if code is None:
+                return indices[:0]
+            indices = indices[self._columns['platform'][indices] == code]
+        return indices
+
+    def summarize(self, indices: np.ndarray, top: int = 5) -> Dict:
+        """
+        Everything a report needs from the posts at `indices` (oldest first),
+        in one vectorized sweep: stats per platform and per content type,
+        the trend between the window's two halves and the `top` posts by
+        engagement (ties keep time order).
+        """
+        scores = self._columns['engagement_score'][indices]
+        groups = {kind: self._group_stats(kind, indices, scores).report(self._names(kind).names)
+                  for kind in self.aggregates.kinds}
+        middle = len(indices) // 2
+        return {
+            'post_count': len(indices),
+            'by_platform': groups['platform'],
+            'by_content_type': groups['content_type'],
+            'trends': self._trends(len(indices), scores[:middle].sum().item(), scores.sum().item()),
+            'top': self._top(scores, indices, top)
+        }
+
+    def summarize_between(self, start: Optional[int] = None, end: Optional[int] = None,
+                          top: int = 5) -> Dict:
+        """
+        The summary of window(start, end), built from the running
+        aggregates: whole buckets are merged as they are and only the posts
+        in the partial buckets at the window's edges (and in the one bucket
+        the trend's halves split) are read. O(buckets + edge posts).
+        """
+        aggregates = self.aggregates
+        width = aggregates.width
+        earliest, latest = aggregates.bounds()
+        first = earliest if start is None else -(-start // width)
+        last = latest if end is None else end // width
+        if first >= last or top > aggregates.top:
+            return self.summarize(self.window(start, end), top)
+        columns = self._columns
+        scores = columns['engagement_score']
+        before = self.window(start, first * width)
+        after = self.window(last * width, end)
+        edges = np.concatenate((before, after))
+        edge_scores = scores[edges]
+        groups = {
+            kind: aggregates.stats(kind, first, last)
+                            .merge(self._group_stats(kind, edges, edge_scores))
+                            .report(self._names(kind).names)
+            for kind in aggregates.kinds
+        }
+
+        # Posts per bucket, in time order after the leading edge
+        buckets, counts, sums = aggregates.timeline(first, last)
+        post_count = len(before) + int(counts.sum()) + len(after)
+        total = edge_scores.sum().item() + sums.sum().item()
+        middle = post_count // 2
+        if middle <= len(before):
+            first_half = scores[before[:middle]].sum().item()
+        else:
+            first_half = scores[before].sum().item()
+            needed = middle - len(before)
+            reached = np.cumsum(counts)
+            split = int(np.searchsorted(reached, needed))
+            if split < len(counts):
+                # The halves meet inside this bucket: read just its posts
+                bucket = buckets[split].item()
+                needed -= int(reached[split - 1]) if split else 0
+                first_half += sums[:split].sum().item()
+                inside = self.window(bucket * width, (bucket + 1) * width)
+                first_half += scores[inside[:needed]].sum().item()
+            else:
+                first_half += sums.sum().item()
+                first_half += scores[after[:needed - int(counts.sum())]].sum().item()
+
+        candidates = np.concatenate((before, aggregates.best_rows(first, last), after))
+        candidates = candidates[np.lexsort((candidates, columns['timestamp'][candidates]))]
+        return {
+            'post_count': post_count,
+            'by_platform': groups['platform'],
+            'by_content_type': groups['content_type'],
+            'trends': self._trends(post_count, first_half, total),
+            'top': self._top(scores[candidates], candidates, top)
+        }
+
+    def _names(self, kind: str) -> Codebook:
+        return self.platforms if kind == 'platform' else self.content_types
+
+    def _group_stats(self, kind: str, indices: np.ndarray, scores: np.ndarray) -> GroupStats:
+        columns = self._columns
+        return GroupStats.of_posts(columns[kind][indices], scores,
+                                   {name: columns[name][indices] for name in TOTALS},
+                                   len(self._names(kind)))
+
+    @staticmethod
+    def _trends(count: int, first_half: float, total: float) -> Dict:
+        """
+        Trend between the mean engagement of a window's first and second
+        half. Direction is 'insufficient_data' below two posts; the change
+        is None when the first half had no engagement to compare against.
+        """
+        if count < 2:
+            average = round(total / count, 2) if count else 0.0
+            return {'direction': 'insufficient_data', 'change_percentage': 0.0,
+                    'first_half_avg': average, 'second_half_avg': average}
+        middle = count // 2
+        avg_first = first_half / middle
+        avg_second = (total - first_half) / (count - middle)
+        if avg_second > avg_first:
+            direction = 'increasing'
+        elif avg_second < avg_first:
+            direction = 'decreasing'
+        else:
+            direction = 'flat'
+        return {
+            'direction': direction,
+            'change_percentage': round((avg_second - avg_first) / avg_first * 100, 2) if avg_first else None,
+            'first_half_avg': round(avg_first, 2),
+            'second_half_avg': round(avg_second, 2)
+        }
+
+    @staticmethod
+    def _top(scores: np.ndarray, indices: np.ndarray, count: int) -> np.ndarray:
+        if len(scores) > count:
+            # Only posts scoring at least the count-th best can make the cut
+            kth = np.partition(scores, len(scores) - count)[len(scores) - count]
+            candidates = np.flatnonzero(scores >= kth)
+        else:
+            candidates = np.arange(len(scores))
+        best = candidates[np.argsort(-scores[candidates], kind='stable')[:count]]
+        return indices[best]
+
+    @staticmethod
+    def _resized(array: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.zeros(capacity, dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _grow(self, capacity: int):
+        self._columns = {name: self._resized(column, capacity)
+                         for name, column in self._columns.items()}
+        self._tag_offsets = self._resized(self._tag_offsets, capacity + 1)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """
+        Everything the store holds as named arrays (see from_state).
+        Stored rows never change, so the columns are views, not copies,
+        and stay valid to read while further posts are added.
+        """
+        size = self._size
+        state = {f'column_{name}': column[:size] for name, column in self._columns.items()}
+        state['tag_offsets'] = self._tag_offsets[:size + 1]
+        state['tag_codes'] = self._tag_codes[:self._tag_count]
+        for kind in CODEBOOKS:
+            # NUL-terminated UTF-8, which unlike a str array doesn't pad every name to the longest
+            names = ''.join(f'{name}\x00' for name in getattr(self, kind).names)
+            state[f'names_{kind}'] = np.frombuffer(names.encode('utf-8'), dtype=np.uint8)
+        state['order'] = np.array([self._in_order, self._latest], dtype=np.int64)
+        state.update({f'aggregates_{key}': value for key, value in self.aggregates.state().items()})
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> 'EngagementStore':
+        """Store restored from state(); the arrays are used as they are, not copied"""
+        store = cls(capacity=0)
+        store._columns = {name: state[f'column_{name}'] for name in store._columns}
+        store._tag_offsets = state['tag_offsets']
+        store._tag_codes = state['tag_codes']
+        store._size = len(store._tag_offsets) - 1
+        store._tag_count = len(store._tag_codes)
+        for kind in CODEBOOKS:
+            names = state[f'names_{kind}'].tobytes().decode('utf-8').split('\x00')[:-1]
+            setattr(store, kind, Codebook(names))
+        in_order, store._latest = state['order'].tolist()
+        store._in_order = bool(in_order)
+        store.aggregates = RunningAggregates.from_state(
+            {key[len('aggregates_'):]: value for key, value in state.items() if key.startswith('aggregates_')})
+        return store
+
+    def nbytes(self) -> int:
+        """Bytes held by the stored posts (column capacity not yet used excluded)"""
+        per_post = sum(column.itemsize for column in self._columns.values()) + self._tag_offsets.itemsize
+        return self._size * per_post + self._tag_count * self._tag_codes.itemsize
+
+def run_store_benchmark(post_count: int = 200_000):
+    """Memory per post and window query time of the columnar store against a list of dicts"""
+    platforms = ['instagram', 'twitter', 'tiktok', 'onlyfans']
+    content_types = ['photo', 'video', 'text', 'exclusive']
+    hashtags = [['#TheSteeleZone', '#ContentCreator', '#Exclusive'], ['#Vlog', '#Lifestyle'], []]
+    start = epoch_us(datetime(2024, 1, 1))
+
+    def post(i: int) -> Dict:
+        return {
+            'platform': platforms[i % 4],
+            'timestamp': from_epoch_us(start + i * 60_000_000).isoformat(),
+            'likes': 500 + i % 1000, 'comments': 40 + i % 90, 'shares': i % 60,
+            'views': 2000 + i % 7000, 'engagement_score': round(20 + (i % 997) / 10, 2),
+            'content_type': content_types[i % 4], 'hashtags': list(hashtags[i % 3])
+        }
+
+    print(f"\n💾 Memory for {post_count:,} tracked posts")
+    print("=" * 60)
+    sample = min(post_count, 100_000)
+    tracemalloc.start()
+    dicts = [post(i) for i in range(sample)]
+    list_bytes = tracemalloc.get_traced_memory()[0] / sample
+    tracemalloc.stop()
+    del dicts
+
+    store = EngagementStore()
+    began = time.perf_counter()
+    for i in range(post_count):
+        store.append(post(i))
+    elapsed = time.perf_counter() - began
+    store_bytes = store.nbytes() / post_count
+    print(f"   List of dicts:  {list_bytes:8.0f} bytes/post")
+    print(f"   Columnar store: {store_bytes:8.0f} bytes/post "
+          f"({list_bytes / store_bytes:.0f}x smaller, {elapsed / post_count * 1e6:.1f} µs/append)")
+    print(f"   Round trip: {store[post_count - 1] == post(post_count - 1)}")
+
+    print(f"\n🔎 Window queries (posts one minute apart, {post_count / 1440:.0f} days)")
+    dicts = [post(i) for i in range(post_count)]
+    latest = start + (post_count - 1) * 60_000_000
+    for days in (1, 7, 30, 90):
+        cutoff = latest - days * 86_400_000_000
+        cutoff_date = from_epoch_us(cutoff)
+        began = time.perf_counter()
+        scanned = [d for d in dicts if datetime.fromisoformat(d['timestamp']) >= cutoff_date]
+        scan_time = time.perf_counter() - began
+        began = time.perf_counter()
+        for _ in range(100):
+            indices = store.window(cutoff)
+        window_time = (time.perf_counter() - began) / 100
+        assert len(indices) == len(scanned)
+        print(f"   {days:>2} days ({len(indices):>7,} posts): full scan {scan_time * 1000:8.2f} ms   "
+              f"time index {window_time * 1000:6.3f} ms")
+
+if __name__ == '__main__':
+    if '--benchmark' in sys.argv:
+        run_store_benchmark()
@@ -4,10 +4,11 @@ Engagement Tracker - AI-Powered Analytics
 Tracks and analyzes engagement across all social media platforms
 """
 
-import json
 from datetime import datetime, timedelta
-from typing import Dict, List
-import statistics
+from typing import Dict, List, Optional
+
+from engagement_store import EngagementStore, epoch_us
+from engagement_log import EngagementLog, open_engagement_log
 
 class AIEngagementTracker:
     """
@@ -15,10 +16,17 @@ class AIEngagementTracker:
     across all platforms and provides actionable insights.
     """
     
-    def __init__(self):
+    def __init__(self, log: Optional[EngagementLog] = None):
+        """
+        Args:
+            log: Durable post history (defaults to open_engagement_log(); without
+                one, history is kept in memory only)
+        """
         self.platforms = ['instagram', 'twitter', 'tiktok', 'onlyfans']
         self.metrics = {}
-        self.historical_data = []
+        self.log = log if log is not None else open_engagement_log()
+        # Sequence of post dicts, stored as columns; restored from the log when there is one
+        self.historical_data = self.log.store if self.log is not None else EngagementStore()
         self.insights = []
         
     def track_post(self, platform: str, post_data: Dict) -> Dict:
@@ -27,19 +35,27 @@ class AIEngagementTracker:
         Automatically analyzes and stores metrics.
         """
         engagement_score = self._calculate_engagement(post_data)
+        now = datetime.now()
         
         tracked_post = {
             'platform': platform,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now.isoformat(),
             'likes': post_data.get('likes', 0),
             'comments': post_data.get('comments', 0),
             'shares': post_data.get('shares', 0),
             'views': post_data.get('views', 0),
             'engagement_score': engagement_score,
-            'content_type': post_data.get('content_type', 'general')
+            'content_type': post_data.get('content_type', 'general'),
+            'hashtags': list(post_data.get('hashtags', []))
         }
         
-        self.historical_data.append(tracked_post)
+        store = self.log if self.log is not None else self.historical_data
+        store.add(
+            platform, epoch_us(now),
+            tracked_post['likes'], tracked_post['comments'], tracked_post['shares'],
+            tracked_post['views'], engagement_score, tracked_post['content_type'],
+            tracked_post['hashtags']
+        )
         return tracked_post
     
     def _calculate_engagement(self, post_data: Dict) -> float:
@@ -62,92 +78,53 @@ class AIEngagementTracker:
         """
         print(f"\n📊 Analyzing performance for last {days} days...")
         
-        cutoff_date = datetime.now() - timedelta(days=days)
-        recent_posts = [
-            post for post in self.historical_data
-            if datetime.fromisoformat(post['timestamp']) > cutoff_date
-        ]
+        cutoff = epoch_us(datetime.now() - timedelta(days=days))
+        # Built from the running hourly aggregates; feeds every section.
+        # Only posts after the cutoff count (timestamps are whole microseconds)
+        summary = self.historical_data.summarize_between(cutoff + 1, top=5)
         
-        if not recent_posts:
+        if not summary['post_count']:
             return {'error': 'No data available for analysis'}
         
+        by_platform = {
+            platform: summary['by_platform'][platform]
+            for platform in self.platforms if platform in summary['by_platform']
+        }
         analysis = {
             'period': f'Last {days} days',
-            'total_posts': len(recent_posts),
-            'by_platform': self._analyze_by_platform(recent_posts),
-            'best_performing': self._get_top_posts(recent_posts, 5),
-            'engagement_trends': self._calculate_trends(recent_posts),
-            'ai_recommendations': self._generate_recommendations(recent_posts)
+            'total_posts': summary['post_count'],
+            'by_platform': by_platform,
+            'by_content_type': summary['by_content_type'],
+            'best_performing': self.historical_data.records(summary['top'].tolist()),
+            'engagement_trends': summary['trends']
         }
+        analysis['ai_recommendations'] = self._generate_recommendations(analysis)
         
         print("✅ Analysis complete!")
         return analysis
     
-    def _analyze_by_platform(self, posts: List[Dict]) -> Dict:
-        """
-        AI breaks down performance by platform.
-        """
-        platform_stats = {}
-        
-        for platform in self.platforms:
-            platform_posts = [p for p in posts if p['platform'] == platform]
-            
-            if platform_posts:
-                platform_stats[platform] = {
-                    'post_count': len(platform_posts),
-                    'avg_engagement': round(statistics.mean(
-                        [p['engagement_score'] for p in platform_posts]
-                    ), 2),
-                    'total_likes': sum(p['likes'] for p in platform_posts),
-                    'total_comments': sum(p['comments'] for p in platform_posts),
-                    'total_shares': sum(p['shares'] for p in platform_posts)
-                }
-        
-        return platform_stats
-    
-    def _get_top_posts(self, posts: List[Dict], count: int) -> List[Dict]:
+    def posts_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      platform: Optional[str] = None) -> List[Dict]:
         """
-        AI identifies top performing posts.
+        Posts tracked in [start, end), oldest first, optionally for one platform.
+        Found by binary search on the time index, so the cost depends on the
+        window, not on the whole history.
         """
-        sorted_posts = sorted(
-            posts,
-            key=lambda x: x['engagement_score'],
-            reverse=True
+        indices = self.historical_data.window(
+            epoch_us(start) if start is not None else None,
+            epoch_us(end) if end is not None else None,
+            platform
         )
-        return sorted_posts[:count]
+        return self.historical_data.records(indices.tolist())
     
-    def _calculate_trends(self, posts: List[Dict]) -> Dict:
-        """
-        AI identifies engagement trends over time.
-        """
-        if len(posts) < 2:
-            return {'trend': 'insufficient_data'}
-        
-        # Split data into two halves
-        mid_point = len(posts) // 2
-        first_half = posts[:mid_point]
-        second_half = posts[mid_point:]
-        
-        avg_first = statistics.mean([p['engagement_score'] for p in first_half])
-        avg_second = statistics.mean([p['engagement_score'] for p in second_half])
-        
-        change = ((avg_second - avg_first) / avg_first) * 100
-        
-        return {
-            'direction': 'increasing' if change > 0 else 'decreasing',
-            'change_percentage': round(change, 2),
-            'first_half_avg': round(avg_first, 2),
-            'second_half_avg': round(avg_second, 2)
-        }
-    
-    def _generate_recommendations(self, posts: List[Dict]) -> List[str]:
+    def _generate_recommendations(self, analysis: Dict) -> List[str]:
         """
         AI generates actionable recommendations based on data.
         """
         recommendations = []
         
         # Analyze platform performance
-        platform_stats = self._analyze_by_platform(posts)
+        platform_stats = analysis['by_platform']
         if platform_stats:
             best_platform = max(
                 platform_stats.items(),
@@ -158,22 +135,30 @@ class AIEngagementTracker:
             )
         
         # Analyze posting frequency
-        total_posts = len(posts)
+        total_posts = analysis['total_posts']
         if total_posts < 10:
             recommendations.append(
                 "📈 Increase posting frequency for better visibility"
             )
         
         # Analyze engagement trends
-        trends = self._calculate_trends(posts)
+        trends = analysis['engagement_trends']
         if trends['direction'] == 'decreasing':
             recommendations.append(
                 "⚠️ Engagement declining - try new content formats"
             )
-        else:
+        elif trends['direction'] == 'increasing':
             recommendations.append(
                 "🚀 Engagement growing - keep up the great work!"
             )
+        elif trends['direction'] == 'flat':
+            recommendations.append(
+                "➡️ Engagement holding steady - test new formats to grow it"
+            )
+        else:
+            recommendations.append(
+                "📊 Track more posts to reveal engagement trends"
+            )
         
         return recommendations
     
@@ -206,6 +191,11 @@ class AIEngagementTracker:
             report.append(f"  Total Comments: {stats['total_comments']}")
             report.append(f"  Total Shares: {stats['total_shares']}")
         
+        report.append("\n🎬 CONTENT TYPES:")
+        for content_type, stats in analysis['by_content_type'].items():
+            report.append(f"  {content_type}: {stats['post_count']} posts, "
+                          f"{stats['avg_engagement']}% avg engagement")
+        
         report.append("\n🎯 TOP PERFORMING POSTS:")
         for i, post in enumerate(analysis['best_performing'], 1):
             report.append(f"\n#{i} - {post['platform'].upper()}")
@@ -214,8 +204,11 @@ class AIEngagementTracker:
         
         report.append("\n📈 TRENDS:")
         trends = analysis['engagement_trends']
-        report.append(f"  Direction: {trends['direction'].upper()}")
-        report.append(f"  Change: {trends['change_percentage']}%")
+        report.append(f"  Direction: {trends['direction'].replace('_', ' ').upper()}")
+        if trends['change_percentage'] is None:
+            report.append("  Change: n/a (no engagement in the first half)")
+        else:
+            report.append(f"  Change: {trends['change_percentage']}%")
         
         report.append("\n🤖 AI RECOMMENDATIONS:")
         for rec in analysis['ai_recommendations']:
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scripts import their siblings directly, as when run from this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
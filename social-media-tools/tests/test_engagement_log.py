@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from engagement_log import EngagementLog
+
+def fill(log: EngagementLog, count: int, start: int = 0):
+    for i in range(start, start + count):
+        log.add('twitter', 1_700_000_000_000_000 + i * 60_000_000, likes=i, views=1000,
+                engagement_score=float(i % 50), hashtags=['#Vlog'])
+
+def test_snapshots_space_out_geometrically(tmp_path):
+    log = EngagementLog(str(tmp_path), segment_posts=100, snapshot_ratio=0.5)
+    snapshots = []
+    for _ in range(30):
+        fill(log, 100, len(log.store))
+        if log._compactor is not None:
+            log._compactor.join()
+        snapshots.append(log._snapshot_posts)
+    log.close()
+    # Snapshots at 100, 200, 300, 500, 800, 1200, 1800, 2700 posts
+    assert sorted(set(snapshots)) == [100, 200, 300, 500, 800, 1200, 1800, 2700]
+
+    reopened = EngagementLog(str(tmp_path), segment_posts=100, snapshot_ratio=0.5)
+    assert len(reopened.store) == 3000
+    assert reopened.store[-1] == log.store[-1]
+    reopened.close()
+
+def segments(directory) -> list:
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith('segment-'))
+
+def test_torn_tail_of_newest_segment_is_dropped(tmp_path):
+    log = EngagementLog(str(tmp_path), segment_posts=100)
+    fill(log, 50)
+    log.close()
+    newest = segments(tmp_path)[-1]
+    size = os.path.getsize(newest)
+    os.truncate(newest, size - 7)
+
+    reopened = EngagementLog(str(tmp_path), segment_posts=100)
+    assert len(reopened.store) == 49
+    reopened.close()
+
+def test_bad_record_before_the_newest_segment_raises(tmp_path):
+    log = EngagementLog(str(tmp_path), segment_posts=100, snapshot_ratio=1.0)
+    fill(log, 100)
+    log.compact(wait=True)
+    fill(log, 250, 100)  # Segments 1 and 2 after the snapshot, 3 open
+    log.close()
+    older = segments(tmp_path)[0]
+    with open(older, 'r+b') as segment:
+        segment.seek(os.path.getsize(older) // 2)
+        segment.write(b'\xff\xff\xff\xff')
+
+    with pytest.raises(ValueError, match='corrupt'):
+        EngagementLog(str(tmp_path), segment_posts=100, snapshot_ratio=1.0)
+    assert os.path.getsize(older) > 0
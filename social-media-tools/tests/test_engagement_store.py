@@ -0,0 +1,36 @@
+import random
+
+from engagement_aggregates import HOUR_US
+from engagement_store import EngagementStore
+
+START = 1_700_000_000_000_000
+
+def comparable(summary: dict) -> dict:
+    return {**summary, 'top': summary['top'].tolist()}
+
+def test_stray_timestamp_costs_one_bucket():
+    store = EngagementStore()
+    for i in range(48):
+        store.add('twitter', START + i * HOUR_US, likes=i, engagement_score=float(i))
+    store.add('twitter', 0, likes=1, engagement_score=1.0)  # The epoch: ~470,000 hours back
+    store.add('twitter', START + 48 * HOUR_US, likes=2, engagement_score=2.0)
+    assert store.aggregates.span == 50
+    assert store.aggregates.nbytes() < 100_000
+    assert comparable(store.summarize_between()) == comparable(store.summarize(store.window()))
+
+def test_windows_match_a_scan_of_the_posts():
+    rng = random.Random(7)
+    store = EngagementStore()
+    timestamps = [START + rng.randrange(500 * HOUR_US) for _ in range(3000)]
+    timestamps[1000:1000] = [START - 10_000 * HOUR_US, START + 90_000 * HOUR_US]
+    for timestamp in timestamps:
+        store.add(rng.choice(['instagram', 'tiktok']), timestamp, likes=rng.randrange(100),
+                  engagement_score=round(rng.uniform(0, 90), 2), content_type=rng.choice(['photo', 'video']))
+    assert not store.aggregates._in_order
+    windows = [(None, None), (START, None), (None, START + 250 * HOUR_US)]
+    for _ in range(20):
+        start, end = sorted(START + rng.randrange(-20, 520) * HOUR_US + rng.randrange(HOUR_US) for _ in range(2))
+        windows.append((start, end))
+    for start, end in windows:
+        assert (comparable(store.summarize_between(start, end))
+                == comparable(store.summarize(store.window(start, end))))
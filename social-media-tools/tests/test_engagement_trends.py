@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import engagement_tracker
+from engagement_store import epoch_us
+from engagement_tracker import AIEngagementTracker
+
+@pytest.fixture
+def tracker(monkeypatch):
+    # History in memory only, whatever the environment says
+    monkeypatch.delenv('ENGAGEMENT_LOG', raising=False)
+    return AIEngagementTracker()
+
+def test_no_posts(tracker):
+    assert tracker.analyze_performance(30) == {'error': 'No data available for analysis'}
+    assert tracker.generate_report(30) == "No data available for report generation."
+
+def test_single_post(tracker):
+    tracker.track_post('instagram', {'likes': 50, 'comments': 5, 'shares': 1, 'views': 1000})
+    analysis = tracker.analyze_performance(30)
+    assert analysis['engagement_trends']['direction'] == 'insufficient_data'
+    assert "📊 Track more posts to reveal engagement trends" in analysis['ai_recommendations']
+    assert "Direction: INSUFFICIENT DATA" in tracker.generate_report(30)
+
+def test_all_zero_engagement(tracker):
+    for _ in range(4):
+        tracker.track_post('twitter', {'likes': 0, 'comments': 0, 'shares': 0, 'views': 500})
+    trends = tracker.analyze_performance(30)['engagement_trends']
+    assert trends == {'direction': 'flat', 'change_percentage': None,
+                      'first_half_avg': 0.0, 'second_half_avg': 0.0}
+    assert "Change: n/a (no engagement in the first half)" in tracker.generate_report(30)
+
+def test_growth_from_zero_engagement(tracker):
+    for likes in (0, 0, 40, 60):
+        tracker.track_post('tiktok', {'likes': likes, 'views': 1000})
+    trends = tracker.analyze_performance(30)['engagement_trends']
+    assert trends['direction'] == 'increasing'
+    assert trends['change_percentage'] is None
+    assert trends['second_half_avg'] == 5.0
+
+def test_post_exactly_at_the_cutoff_is_left_out(tracker, monkeypatch):
+    now = datetime(2026, 3, 1, 12, 0, 0)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+    monkeypatch.setattr(engagement_tracker, 'datetime', FrozenDatetime)
+    cutoff = epoch_us(now - timedelta(days=30))
+    for offset, likes in ((0, 90), (1, 10), (3_600_000_000, 30)):
+        tracker.historical_data.add('instagram', cutoff + offset, likes=likes, views=1000,
+                                    engagement_score=float(likes))
+    analysis = tracker.analyze_performance(30)
+    assert analysis['total_posts'] == 2
+    assert analysis['engagement_trends']['first_half_avg'] == 10.0